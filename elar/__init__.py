@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 import os
+import click
 from flask import Flask
 # import firebase_admin
 # from firebase_admin import credentials
@@ -9,6 +10,7 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_marshmallow import Marshmallow
 from flask_migrate import Migrate
 from elar.services.redis import RedisService
+from elar.services.auth_context import AuthContextCache, register_invalidation_listeners
 from flask_cors import CORS
 from flask_mail import Mail
 from flask_allows import Allows
@@ -18,7 +20,9 @@ from apispec.ext.marshmallow import MarshmallowPlugin
 from flask_apispec import FlaskApiSpec
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
-from elar.utils.s3_tools2 import configure_s3_client_
+from elar.utils.template_cache import make_bytecode_cache, warm_up_templates
+from elar.notification.engine import NotificationEngine
+from elar.sensors.measurements import measurement_batcher
 
 # import klippa_ocr_api
 import logging
@@ -35,7 +39,6 @@ allows = Allows()
 # pusher = Pusher()
 docs = FlaskApiSpec()
 limiter = Limiter(key_func=get_remote_address)
-s3_client = configure_s3_client_()
 
 
 # def init_klippa(app, api_key):
@@ -79,8 +82,23 @@ def create_app(full_init=False) -> Flask:
     config_path = "conf." + os.getenv("FLASK_ENV", "development")
     app.config.from_object(config_path)
 
-    app.redis = RedisService(app.config["REDIS_URI"])
-    app.env = load_template_env()
+    app.redis = RedisService(
+        app.config["REDIS_URI"],
+        denylist_mode=app.config.get("TOKEN_DENYLIST_MODE", "plain"),
+        denylist_refresh_interval=app.config.get("TOKEN_DENYLIST_REFRESH_INTERVAL", 10),
+    )
+    app.auth_context_cache = AuthContextCache(
+        app.redis,
+        ttl=app.config.get("AUTH_CONTEXT_CACHE_TTL", 300),
+        local_ttl=app.config.get("AUTH_CONTEXT_LOCAL_CACHE_TTL", 5),
+    )
+    app.env = load_template_env(make_bytecode_cache(app.config, app.redis))
+    app.notification_engine = NotificationEngine(app.env)
+    measurement_batcher.init_app(
+        app,
+        max_size=app.config.get("SENSOR_BATCH_SIZE", 500),
+        max_age=app.config.get("SENSOR_BATCH_WINDOW", 1),
+    )
 
     app.url_map.strict_slashes = False
 
@@ -95,6 +113,10 @@ def create_app(full_init=False) -> Flask:
 
     if full_init:
         register_blueprints(app)
+        # compiled in the uwsgi master / celery parent, inherited by forked workers
+        if app.config.get("MAIL_TEMPLATE_WARM_UP", True):
+            warm_up_templates(app.env)
+    register_commands(app)
 
     app.config.update(
         {
@@ -121,6 +143,7 @@ def create_app(full_init=False) -> Flask:
 
 def init_extensions(app):
     db.init_app(app)
+    register_invalidation_listeners()
     ma.init_app(app)
     migrate.init_app(app, db)
     mail.init_app(app)
@@ -141,12 +164,21 @@ def register_blueprints(app: Flask):
     app.register_blueprint(health_check_bp, url_prefix=f"/{service_name}/")
 
 
-def load_template_env():
+def load_template_env(bytecode_cache=None):
     from jinja2 import Environment, PackageLoader
     from jinja2 import select_autoescape
 
     env = Environment(
         loader=PackageLoader("elar", "mail_templates"),
         autoescape=select_autoescape(["html"]),
+        bytecode_cache=bytecode_cache,
     )
     return env
+
+
+def register_commands(app):
+    @app.cli.command("compile-mail-templates")
+    def compile_mail_templates():
+        """Compile mail templates into the bytecode cache."""
+        names = warm_up_templates(app.env)
+        click.echo(f"{len(names)} mail templates compiled")
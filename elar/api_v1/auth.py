@@ -8,6 +8,7 @@ Authentication APIs.
 # from datetime import datetime, timedelta
 from datetime import datetime, timedelta
 import logging
+import time
 import urllib.parse
 
 from flask.helpers import make_response
@@ -20,13 +21,15 @@ from elar.models import User
 from sqlalchemy import func
 from flask_httpauth import HTTPBasicAuth, HTTPTokenAuth
 from elar.common.decorators import json
-from elar.dal.managers import ClientAccountManager
+from elar.dal.secure_access import resolve_eligible_client_ids
+from elar.authorization import ScopedPrincipal, current_user, decode_client_scopes
 from elar.models import ClientAccountUser
 from flask_apispec.annotations import doc
 from elar import db, limiter
 from elar.common.validations import validate_integer, validate_password
 
 logger = logging.getLogger(__name__)
+READ_ONLY_METHODS = ("GET", "HEAD", "OPTIONS")
 basic_auth = HTTPBasicAuth()
 token_auth = HTTPTokenAuth()
 
@@ -58,7 +61,7 @@ def verify_token():
     """
     Verify token
     """
-    return {"user": g.user.export_data(), "message": "Token verifyed successfully"}, 200
+    return {"user": current_user().export_data(), "message": "Token verifyed successfully"}, 200
 
 
 @public.route("/auth/signup", methods=["POST"])
@@ -305,6 +308,63 @@ def unauthorized():
     return response
 
 
+def load_auth_context(user_id):
+    """
+    Put the user and ids of client accounts the user may access into g.
+    Served from the auth context cache, hits the DB only on a cache miss.
+    """
+    cache = current_app.auth_context_cache
+    context = cache.get(user_id)
+    if context is None:
+        user = User.query.get(user_id)
+        if user is None:
+            return None
+        context = {
+            "user": user.export_snapshot(),
+            "eligible_client_ids": resolve_eligible_client_ids(user.id),
+        }
+        cache.set(user_id, context)
+    else:
+        user = User.from_snapshot(context["user"])
+    g.user = user
+    g.eligible_clients = context["eligible_client_ids"]
+    return user
+
+
+def load_scoped_auth_context(data):
+    """
+    Authorize read-only requests from scopes embedded in the access token
+    without touching the DB. g.user is then a ScopedPrincipal holding only
+    the user id and email_verified. Returns None if the token has no
+    scopes, they are stale or expired or the request may modify data.
+    """
+    if "scopes" not in data or request.method not in READ_ONLY_METHODS:
+        return None
+    if data.get("authz_version") != current_app.redis.get_authz_version(data["user_id"]):
+        return None
+    if data.get("scopes_expire", 0) < time.time():
+        return None
+    g.user = ScopedPrincipal(data["user_id"], data["email_verified"])
+    g.eligible_clients = decode_client_scopes(data["scopes"])
+    return g.user
+
+
+def check_requested_client_account():
+    client_account_id = validate_integer(request.args.get("client_account_id", type=int))
+    g.client_account_id = client_account_id
+    if client_account_id and client_account_id not in g.eligible_clients:
+        logger.info(
+            "g.user: "
+            + str(g.user.id)
+            + " eligible_client_account_id: "
+            + str(g.eligible_clients)
+            + "client_account_id: "
+            + str(client_account_id)
+        )
+        return False
+    return True
+
+
 @token_auth.verify_token
 def verify_auth_token(auth_token):
     if current_app.config.get("IGNORE_AUTH") is True:
@@ -312,88 +372,24 @@ def verify_auth_token(auth_token):
     else:
         if current_app.redis.is_token_denied(auth_token):
             return False
-        g.user = User.verify_auth_token(auth_token)
+        data = User.load_token_data(auth_token, "access_token")
+        g.user = None
+        if data:
+            g.user = load_scoped_auth_context(data) or load_auth_context(data["user_id"])
         g.auth_token = auth_token
-        if g.user:
-            g.client_accounts = ClientAccountManager.get_client_accounts_by_user_id(
-                g.user.id
-            )
-            g.client_account_ids = [
-                client_account.id for client_account in g.client_accounts
-            ]
-            g.client_account_id = validate_integer(
-                request.args.get("client_account_id", None)
-            )
-            g.contracts = g.user.export_contracts()
-            eligible_client_account_id = []
-            for account in g.client_accounts:
-                eligible_client_account_id.append(account.id)
-            for contract in g.contracts:
-                eligible_client_account_id.append(contract)
-            g.eligible_clients = eligible_client_account_id
-            client_account_id = validate_integer(
-                request.args.get("client_account_id", type=int)
-            )
-            if (
-                client_account_id
-                and client_account_id not in eligible_client_account_id
-            ):
-                logger.info(
-                    "g.user: "
-                    + str(g.user.id)
-                    + " "
-                    + str(g.user.first_name)
-                    + " "
-                    + str(g.user.last_name)
-                    + "eligible_client_account_id: "
-                    + str(eligible_client_account_id)
-                    + "client_account_id: "
-                    + str(client_account_id)
-                )
-                return False
+        if g.user and not check_requested_client_account():
+            return False
     return g.user is not None
 
 
 def verify_refresh_token(refresh_token):
     if current_app.redis.is_token_denied(refresh_token):
         return False
-    g.user = User.verify_refresh_token(refresh_token)
+    data = User.load_token_data(refresh_token, "refresh_token")
+    g.user = load_auth_context(data["user_id"]) if data else None
     g.auth_token = refresh_token
-    if g.user:
-        g.client_accounts = ClientAccountManager.get_client_accounts_by_user_id(
-            g.user.id
-        )
-        g.client_account_ids = [
-            client_account.id for client_account in g.client_accounts
-        ]
-        g.client_account_id = validate_integer(
-            request.args.get("client_account_id", None)
-        )
-        g.contracts = g.user.export_data().get("contracts")
-        eligible_client_account_id = []
-        for account in g.client_accounts:
-            eligible_client_account_id.append(account.id)
-        for contract in g.contracts:
-            eligible_client_account_id.append(contract["client_account_id"])
-        g.eligible_clients = eligible_client_account_id
-        client_account_id = validate_integer(
-            request.args.get("client_account_id", type=int)
-        )
-        if client_account_id and client_account_id not in eligible_client_account_id:
-            logger.info(
-                "g.user: "
-                + str(g.user.id)
-                + " "
-                + str(g.user.first_name)
-                + " "
-                + str(g.user.last_name)
-                + "eligible_client_account_id: "
-                + str(eligible_client_account_id)
-                + "client_account_id: "
-                + str(client_account_id)
-            )
-            return False
-
+    if g.user and not check_requested_client_account():
+        return False
     return g.user is not None
 
 
@@ -411,14 +407,6 @@ def unauthorized_token():
 
 
 def get_eligible_clients(client_account_id):
-    g.client_accounts = ClientAccountManager.get_client_accounts_by_user_id(g.user.id)
-    g.client_account_ids = [client_account.id for client_account in g.client_accounts]
     g.client_account_id = client_account_id
-    g.contracts = g.user.export_data().get("contracts")
-    eligible_client_account_id = []
-    for account in g.client_accounts:
-        eligible_client_account_id.append(account.id)
-    for contract in g.contracts:
-        eligible_client_account_id.append(contract["client_account_id"])
-    g.eligible_clients = eligible_client_account_id
-    return eligible_client_account_id
+    g.eligible_clients = resolve_eligible_client_ids(g.user.id)
+    return g.eligible_clients
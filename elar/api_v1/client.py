@@ -7,12 +7,13 @@ from elar.dal.client_overview import (
     get_sales,
     get_client_currency,
 )
-from flask import g, request
+from flask import request
 from flask_apispec.annotations import doc
 from elar import docs
 
 from ..common.enums.role_enum import ROLE_CLIENT_ACCOUNT_OWNER
 from elar.common.validations import validate_integer
+from elar.authorization import current_user
 
 logger = logging.getLogger(__name__)
 
@@ -198,7 +199,7 @@ Acceptable arguments:
 def get_client_overview():
     client_account_id = validate_integer(request.args.get("client_account_id", None))
     if not client_account_id:
-        client_account_id = g.user.get_first_client_account_id(
+        client_account_id = current_user().get_first_client_account_id(
             [ROLE_CLIENT_ACCOUNT_OWNER]
         )
     if not client_account_id:
@@ -275,7 +276,7 @@ Acceptable arguments:
 def get_client_accounting_companies():
     client_account_id = validate_integer(request.args.get("client_account_id", None))
     if not client_account_id:
-        client_account_id = g.user.get_first_client_account_id(
+        client_account_id = current_user().get_first_client_account_id(
             [ROLE_CLIENT_ACCOUNT_OWNER]
         )
     if not client_account_id:
@@ -1,7 +1,12 @@
 
+import hmac
+
 from . import healthy
+from flask import current_app, jsonify, Response
 from flask_apispec.annotations import doc
+from flask_httpauth import HTTPTokenAuth
 from elar import docs
+from elar.utils.task_metrics import METRICS_KEY, render_metrics
 
 
 @healthy.route('/health_check', methods=['GET'])
@@ -26,3 +31,40 @@ def health_check():
 
 
 docs.register(health_check, blueprint="health_check")
+
+metrics_auth = HTTPTokenAuth()
+
+
+@metrics_auth.verify_token
+def verify_metrics_token(token):
+    """
+    The scraper authenticates with the METRICS_TOKEN bearer token,
+    nobody does while it is not configured.
+    """
+    expected = current_app.config.get("METRICS_TOKEN")
+    return bool(expected and token) and hmac.compare_digest(token.encode(), expected.encode())
+
+
+@metrics_auth.error_handler
+def unauthorized_metrics():
+    response = jsonify({"status": 401, "error": "unauthorized", "message": "please send the metrics token"})
+    response.status_code = 401
+    return response
+
+
+@healthy.route('/metrics', methods=['GET'])
+@metrics_auth.login_required
+@doc(tags=["health check"], responses={200: {'description': """Celery task metrics in Prometheus text format."""}},
+     description="""Queue wait and run time histograms, outcomes and retries per task, summed over all worker processes.
+Needs the METRICS_TOKEN bearer token, disabled while it is not configured.""")  # noqa = 501
+def task_metrics():
+    """
+    Prometheus scrape endpoint of worker task metrics.
+    """
+    return Response(
+        render_metrics(current_app.redis.get_hash(METRICS_KEY)),
+        mimetype='text/plain; version=0.0.4',
+    )
+
+
+docs.register(task_metrics, blueprint="health_check")
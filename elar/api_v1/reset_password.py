@@ -6,7 +6,6 @@ from flask import request, escape
 from . import public
 from elar.models.users import User
 from flask import current_app as app, url_for, redirect
-from flask_mail import Message
 from elar import db, limiter
 from urllib.parse import urlparse
 from flask_apispec.annotations import doc
@@ -18,6 +17,7 @@ from ..common.exceptions import ValidationError
 from elar.common.validations import validate_password
 from ..dal.users import password_used_before
 from ..models import UsedPasswords
+from ..notification.email_dispatch import send_email
 
 logger = logging.getLogger(__name__)
 
@@ -62,9 +62,7 @@ def reset_password():
                     {'https://' + backend_url + URI_APPENDIX + '/reset-password/' + token}"
         )
         logger.info(f"reset password for user {user.email}, token: {token}")
-        msg = Message("Reset Password", recipients=[email])
-
-        msg.html = app.env.get_template(email_template).render(
+        html = app.env.get_template(email_template).render(
             **{
                 "reset_url": "https://"
                 + backend_url
@@ -73,7 +71,7 @@ def reset_password():
                 + token
             }
         )
-        app.mail.send(msg)
+        send_email("Reset Password", [email], html=html)
     return {}, 201
 
 
@@ -116,9 +114,8 @@ def reset_password_mobile():
     code = User.generate_reset_password_code(email=email, time=time)
 
     logger.info(f"reset password for user {email}, code: {code}")
-    msg = Message(email_subject, recipients=[email])
-    msg.html = app.env.get_template(email_template).render(**{"reset_code": f"{code}"})
-    app.mail.send(msg)
+    html = app.env.get_template(email_template).render(**{"reset_code": f"{code}"})
+    send_email(email_subject, [email], html=html)
     return {"status": True, "date": time, "message": "Code sent to user"}, 200
 
 
@@ -261,15 +258,14 @@ def register_user():
         f"register_url: {'https://' + urlparse(request.url_root).hostname + '/register-user/' + token}"
     )
     logger.info(f"register user {user.email}, token: {token}")
-    msg = Message("Email verification", recipients=[email])
-    msg.html = app.env.get_template("register_user.html").render(
+    html = app.env.get_template("register_user.html").render(
         **{
             "register_url": url_for(
                 "public.confirm_new_user_token", token=token, _external=True
             )
         }
     )
-    app.mail.send(msg)
+    send_email("Email verification", [email], html=html)
     return {"id": user.id}, 201
 
 
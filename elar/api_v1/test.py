@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 from . import public, api
 from elar.common.decorators import json
+from elar.dal.managers import ClientAccountManager
 from flask import g
 
 
@@ -15,9 +16,10 @@ def test_public():
 @api.route('/token-test/', methods=['POST'])
 @json
 def test_token():
+    client_accounts = ClientAccountManager.get_client_accounts_by_user_id(g.user.id)
     return {
         'msg': 'token tested',
-        'client_accounts': [account.export_data() for account in g.client_accounts],
-        'len': len(g.client_accounts),
-        'ids': g.client_account_ids,
+        'client_accounts': [account.export_data() for account in client_accounts],
+        'len': len(client_accounts),
+        'ids': [account.id for account in client_accounts],
     }, 200
@@ -12,7 +12,7 @@ import hashlib
 from elar.common.decorators import (json, paginate)
 from elar.models.users import User
 from elar import db
-from elar.authorization import is_admin
+from elar.authorization import current_user, is_admin
 from flask_allows import requires
 from flask import request, current_app as app, g
 import boto3
@@ -328,7 +328,7 @@ def create_user():
      description="""Returns User profile. Currently under development.""")
 @json
 def get_user_profile():
-    return get_profile_info_(g.user), 200
+    return get_profile_info_(current_user()), 200
 
 
 # @api.route('/users/<int:id>', methods=['DELETE'])
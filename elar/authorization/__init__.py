@@ -1,6 +1,10 @@
 # -*- coding: utf-8 -*-
-from .user_context import load_user_context
+from .user_context import ScopedPrincipal, current_user, load_user_context
 from .role_requirement import HasRole, is_admin
+from .scopes import encode_client_scopes, decode_client_scopes
 
 
-__all__ = ['load_user_context', 'HasRole', 'is_admin']
+__all__ = [
+    'ScopedPrincipal', 'current_user', 'load_user_context', 'HasRole', 'is_admin',
+    'encode_client_scopes', 'decode_client_scopes',
+]
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+import base64
+
+# bitmap bytes, keeps the token well below the uwsgi buffer-size
+MAX_SCOPES_BYTES = 2048
+
+
+def encode_client_scopes(client_ids):
+    """
+    Pack client account ids into compact "<base>.<bitmap>" string.
+    Bit i of the urlsafe base64 encoded bitmap marks client account base + i.
+    Returns None when the ids are too far apart to fit MAX_SCOPES_BYTES,
+    such tokens carry no scopes and requests are authorized from the DB.
+    """
+    client_ids = set(client_ids)
+    if not client_ids:
+        return ''
+    base = min(client_ids)
+    if max(client_ids) - base >= MAX_SCOPES_BYTES * 8:
+        return None
+    bits = 0
+    for client_id in client_ids:
+        bits |= 1 << (client_id - base)
+    raw = bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+    return f"{base}.{base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')}"
+
+
+def decode_client_scopes(scopes):
+    """
+    Unpack client account ids packed by encode_client_scopes().
+    """
+    if not scopes:
+        return []
+    base, _, packed = scopes.partition('.')
+    base = int(base)
+    raw = base64.urlsafe_b64decode(packed + '=' * (-len(packed) % 4))
+    return [
+        base + index * 8 + bit
+        for index, byte in enumerate(raw)
+        if byte
+        for bit in range(8)
+        if byte >> bit & 1
+    ]
@@ -24,6 +24,35 @@ class UserContext(dict):
         return self.get('_permissions')
 
 
+class ScopedPrincipal():
+    """
+    Caller of a read-only request authorized from the scopes embedded in
+    the access token. Holds only what the token carries, any other
+    attribute raises AttributeError instead of querying the DB: views
+    needing the full user get it from current_user().
+    """
+
+    __slots__ = ('id', 'email_verified')
+
+    def __init__(self, id, email_verified):
+        self.id = id
+        self.email_verified = email_verified
+
+    def __repr__(self):
+        return f'<ScopedPrincipal {self.id}>'
+
+
+def current_user():
+    """
+    The authenticated User, loaded in place of a ScopedPrincipal on first use.
+    """
+    from elar.models import User
+
+    if isinstance(g.user, ScopedPrincipal):
+        g.user = User.query.get(g.user.id)
+    return g.user
+
+
 def load_user_context():
     roles = []
     permissions = {}
@@ -0,0 +1,84 @@
+import base64
+import json
+
+from sqlalchemy import inspect
+
+from elar.common.exceptions import ValidationError
+
+CURSOR_NEXT = 'n'
+CURSOR_PREV = 'p'
+
+
+def encode_cursor(direction, key):
+    raw = json.dumps([direction, key], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Empty cursor means first page.
+    """
+    if not cursor:
+        return CURSOR_NEXT, None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        direction, key = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValidationError('Invalid cursor')
+    # keys are integer primary keys, anything else must not reach the filter
+    if direction not in (CURSOR_NEXT, CURSOR_PREV) or type(key) is not int:
+        raise ValidationError('Invalid cursor')
+    return direction, key
+
+
+class KeysetPage():
+    def __init__(self, items, key_attr, has_prev, has_next):
+        self.items = items
+        self.key_attr = key_attr
+        self.has_prev = has_prev
+        self.has_next = has_next
+
+    @property
+    def prev_cursor(self):
+        if not self.has_prev or not self.items:
+            return None
+        return encode_cursor(CURSOR_PREV, getattr(self.items[0], self.key_attr))
+
+    @property
+    def next_cursor(self):
+        if not self.has_next or not self.items:
+            return None
+        return encode_cursor(CURSOR_NEXT, getattr(self.items[-1], self.key_attr))
+
+
+def get_keyset_attr(query):
+    """
+    Name of the primary key attribute of the query's primary entity,
+    used as stable seek key.
+    """
+    mapper = inspect(query.column_descriptions[0]['entity'])
+    return mapper.get_property_by_column(mapper.primary_key[0]).key
+
+
+def keyset_paginate(query, cursor, per_page):
+    """
+    Seek based pagination: instead of OFFSET the page starts right after
+    (or before) the key stored in the cursor, so deep pages cost the same
+    as the first one. Any ordering of the query is replaced by the key.
+    """
+    direction, last_key = decode_cursor(cursor)
+    key_attr = get_keyset_attr(query)
+    key = getattr(query.column_descriptions[0]['entity'], key_attr)
+    query = query.order_by(None)
+
+    if direction == CURSOR_PREV:
+        rows = query.filter(key < last_key).order_by(key.desc()).limit(per_page + 1).all()
+        if len(rows) > per_page:
+            return KeysetPage(rows[:per_page][::-1], key_attr, has_prev=True, has_next=True)
+        # reached the beginning, serve a full first page instead of a short one
+        last_key = None
+
+    if last_key is not None:
+        query = query.filter(key > last_key)
+    rows = query.order_by(key.asc()).limit(per_page + 1).all()
+    return KeysetPage(rows[:per_page], key_attr, has_prev=last_key is not None, has_next=len(rows) > per_page)
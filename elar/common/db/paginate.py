@@ -1,38 +1,60 @@
-from flask import url_for, request
+from flask import abort, url_for, request
+from flask_sqlalchemy import Pagination
 
+from elar.common.db.totals import TOTAL_EXACT, count_total
 
-def build_pages_dict(p, page, per_page):
-    return {
+
+def paginate_query(query, page, per_page):
+    """
+    Same as Flask-SQLAlchemy's query.paginate() with error_out, but the
+    total comes from count_total(). Returns the page and the total strategy.
+    """
+    if page < 1 or per_page < 0:
+        abort(404)
+    items = query.limit(per_page).offset((page - 1) * per_page).all()
+    if not items and page != 1:
+        abort(404)
+    if page == 1 and len(items) < per_page:
+        total, strategy = len(items), TOTAL_EXACT
+    else:
+        total, strategy = count_total(query)
+    return Pagination(query, page, per_page, total, items), strategy
+
+
+class PageLinks():
+    """
+    Pagination links of the current request.
+    url_for() runs once with a placeholder in place of `param`,
+    each link is then a plain string substitution.
+    """
+
+    PLACEHOLDER = "__page__"
+
+    def __init__(self, param="page", endpoint=None, **params):
+        self.template = url_for(
+            str(endpoint or request.endpoint), _external=True, **{param: self.PLACEHOLDER, **params}
+        )
+
+    def url(self, value):
+        return self.template.replace(self.PLACEHOLDER, str(value), 1)
+
+    def page_urls(self, p):
+        return {
+            "prev_url": self.url(p.prev_num) if p.has_prev else None,
+            "next_url": self.url(p.next_num) if p.has_next else None,
+            "first_url": self.url(1),
+            "last_url": self.url(p.pages),
+        }
+
+
+def build_pages_dict(p, page, per_page, total_strategy=None, links=None):
+    pages = {
         "page": page,
         "per_page": per_page,
         "total": p.total,
         "pages": p.pages,
-        "prev_url": url_for(
-            str(request.endpoint),
-            page=p.prev_num,
-            per_page=per_page,
-            expanded=1,
-            _external=True,
-        )
-        if p.has_prev
-        else None,
-        "next_url": url_for(
-            str(request.endpoint),
-            page=p.next_num,
-            per_page=per_page,
-            expanded=1,
-            _external=True,
-        )
-        if p.has_next
-        else None,
-        "first_url": url_for(
-            str(request.endpoint), page=1, per_page=per_page, expanded=1, _external=True
-        ),
-        "last_url": url_for(
-            str(request.endpoint),
-            page=p.pages,
-            per_page=per_page,
-            expanded=1,
-            _external=True,
-        ),
     }
+    if total_strategy:
+        pages["total_strategy"] = total_strategy
+    pages.update((links or PageLinks(per_page=per_page, expanded=1)).page_urls(p))
+    return pages
@@ -0,0 +1,86 @@
+import hashlib
+import json
+
+from flask import current_app
+from sqlalchemy import Table, text
+
+from elar import db
+from elar.utils.ttl_cache import TTLCache
+
+TOTAL_EXACT = 'exact'
+TOTAL_ESTIMATE = 'estimate'
+TOTAL_CACHED = 'cached'
+
+COUNT_CACHE_PREFIX = 'count:'
+
+# planner statistics change slowly, no need to ask pg_class on every request
+table_estimates = TTLCache(maxsize=256, ttl=60)
+
+
+def estimate_table_rows(table_name):
+    """
+    Row count of the table according to planner statistics,
+    None if the table was never analyzed.
+    """
+    estimate = table_estimates.get(table_name)
+    if estimate is None:
+        estimate = db.session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)"),
+            {"name": table_name},
+        ).scalar()
+        estimate = estimate if estimate and estimate > 0 else -1
+        table_estimates.set(table_name, estimate)
+    return estimate if estimate >= 0 else None
+
+
+def count_cache_key(query):
+    """
+    Key of the filtered count: hash of the compiled statement plus bound
+    parameters, so equal filters share one entry regardless of page.
+    """
+    compiled = query.order_by(None).statement.compile()
+    normalized = str(compiled) + json.dumps(compiled.params, sort_keys=True, default=str)
+    return COUNT_CACHE_PREFIX + hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+
+def bare_table(query):
+    """
+    The table of a query reading one table without filters, DISTINCT,
+    GROUP BY or HAVING, which is the only case where the query has as many
+    rows as the table. None otherwise.
+    """
+    statement = query.statement
+    froms = statement.froms
+    if len(froms) != 1 or not isinstance(froms[0], Table):
+        return None
+    if statement._whereclause is not None or statement._distinct or statement._having is not None:
+        return None
+    if statement._group_by_clause.clauses:
+        return None
+    return froms[0]
+
+
+def count_total(query):
+    """
+    Total rows of the paginated query and the strategy used to get it.
+
+    Small tables are always counted exactly. For large tables a bare select
+    of the table reports the planner estimate, any other query (filtered,
+    joined, DISTINCT or grouped) is counted once and cached in Redis for
+    PAGINATION_COUNT_CACHE_TTL seconds.
+    """
+    table = query.column_descriptions[0]['entity'].__table__
+    estimate = estimate_table_rows(table.name)
+    if estimate is None or estimate < current_app.config.get("PAGINATION_EXACT_COUNT_LIMIT", 10000):
+        return query.order_by(None).count(), TOTAL_EXACT
+
+    if bare_table(query) is table:
+        return estimate, TOTAL_ESTIMATE
+
+    key = count_cache_key(query)
+    cached = current_app.redis.get(key)
+    if cached is not None:
+        return int(cached), TOTAL_CACHED
+    total = query.order_by(None).count()
+    current_app.redis.setex(key, current_app.config.get("PAGINATION_COUNT_CACHE_TTL", 30), total)
+    return total, TOTAL_EXACT
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 import functools
-import inspect
 from flask import jsonify
+from elar.common.serialization import export_item
 
 
 def json(f):
@@ -31,11 +31,7 @@ def json(f):
             if _with_str:
                 _with = [s.strip() for s in _with_str.split(",") if s]
 
-            rv = (
-                rv.export_data(expand=_with)
-                if "expand" in inspect.getfullargspec(rv.export_data).args
-                else rv.export_data()
-            )
+            rv = export_item(rv, expand=_with)
 
         # generate the JSON response
         rv = jsonify(rv)
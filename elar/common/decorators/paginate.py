@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
 import functools
-import inspect
-from flask import url_for, request
+from flask import request
+from elar.common.db.keyset import keyset_paginate
+from elar.common.db.paginate import PageLinks, build_pages_dict, paginate_query
+from elar.common.db.totals import count_total
+from elar.common.serialization import export_items
 
 
 def paginate(collection, max_per_page=25):
@@ -13,7 +16,11 @@ def paginate(collection, max_per_page=25):
     The output of this decorator is a Python dictionary with the paginated
     results. The application must ensure that this result is converted to a
     response object, either by chaining another decorator or by using a
-    custom response object that accepts dictionaries."""
+    custom response object that accepts dictionaries.
+
+    Passing `?cursor=` (empty for the first page) switches to keyset
+    pagination: pages are seeked by primary key, `pages` carries opaque
+    next/prev cursors and the total is only counted with `?with_total=1`."""
 
     def decorator(f):
         @functools.wraps(f)
@@ -35,9 +42,6 @@ def paginate(collection, max_per_page=25):
             if _with_str:
                 _with = [s.strip() for s in _with_str.split(",") if s]
 
-            # run the query with Flask-SQLAlchemy's pagination
-            p = query.paginate(page, per_page)
-
             # new kwargs without params already read from request
             kwargs_unique = {
                 k: kwargs[k]
@@ -45,105 +49,61 @@ def paginate(collection, max_per_page=25):
                 if k not in ["page", "per_page", "expanded", "with"]
             }
 
-            # build the pagination metadata to include in the response
-            pages = {
-                "page": page,
-                "per_page": per_page,
-                "total": p.total,
-                "pages": p.pages,
-            }
-            if p.has_prev:
-                pages["prev_url"] = url_for(
-                    request.endpoint,
-                    page=p.prev_num,
-                    per_page=per_page,
-                    expanded=expanded,
-                    _external=True,
-                    **kwargs_unique
-                )
-            else:
-                pages["prev_url"] = None
-            if p.has_next:
-                pages["next_url"] = url_for(
-                    request.endpoint,
-                    page=p.next_num,
-                    per_page=per_page,
-                    expanded=expanded,
-                    _external=True,
-                    **kwargs_unique
+            cursor = request.args.get("cursor", None, type=str)
+            if cursor is not None:
+                p = keyset_paginate(query, cursor, per_page)
+                pages = build_cursor_pages(
+                    p, cursor, per_page, expanded, kwargs_unique,
+                    total=count_total(query)
+                    if request.args.get("with_total", 0, type=int) != 0
+                    else None,
                 )
-            else:
-                pages["next_url"] = None
-            pages["first_url"] = url_for(
-                request.endpoint,
-                page=1,
-                per_page=per_page,
-                expanded=expanded,
-                _external=True,
-                **kwargs_unique
-            )
-            pages["last_url"] = url_for(
-                request.endpoint,
-                page=p.pages,
-                per_page=per_page,
-                expanded=expanded,
-                _external=True,
-                **kwargs_unique
-            )
+                return {collection: export_page(p.items, expanded, _with), "pages": pages}
 
-            # generate the paginated collection as a dictionary
-            if expanded:
-                results = [
-                    item.export_data(expand=_with)
-                    if "expand" in inspect.getfullargspec(item.export_data).args
-                    and _with
-                    else item.export_data()
-                    for item in p.items
-                ]
-            else:
-                results = [item.get_url() for item in p.items]
+            # run the query with Flask-SQLAlchemy's pagination
+            p, total_strategy = paginate_query(query, page, per_page)
+
+            # build the pagination metadata to include in the response
+            links = PageLinks(per_page=per_page, expanded=expanded, **kwargs_unique)
+            pages = build_pages_dict(p, page, per_page, total_strategy, links)
 
             # return a dictionary as a response
-            return {collection: results, "pages": pages}
+            return {collection: export_page(p.items, expanded, _with), "pages": pages}
 
         return wrapped
 
     return decorator
 
 
+def export_page(items, expanded, _with):
+    # generate the paginated collection
+    if expanded:
+        return export_items(items, expand=_with)
+    return [item.get_url() for item in items]
+
+
+def build_cursor_pages(p, cursor, per_page, expanded, kwargs_unique, total=None):
+    pages = {
+        "cursor": cursor,
+        "per_page": per_page,
+        "prev_cursor": p.prev_cursor,
+        "next_cursor": p.next_cursor,
+    }
+    if total is not None:
+        pages["total"], pages["total_strategy"] = total
+    links = PageLinks("cursor", per_page=per_page, expanded=expanded, **kwargs_unique)
+    pages["prev_url"] = links.url(p.prev_cursor) if p.prev_cursor else None
+    pages["next_url"] = links.url(p.next_cursor) if p.next_cursor else None
+    pages["first_url"] = links.url("")
+    return pages
+
+
 def get_paginate(query, max_per_page=25):
     # obtain pagination arguments from the URL's query string
     page = request.args.get("page", 1, type=int)
     per_page = min(request.args.get("per_page", max_per_page, type=int), max_per_page)
     # run the query with Flask-SQLAlchemy's pagination
-    p = query.paginate(page, per_page)
+    p, total_strategy = paginate_query(query, page, per_page)
 
     # build the pagination metadata to include in the response
-    pages = {"page": page, "per_page": per_page, "total": p.total, "pages": p.pages}
-    if p.has_prev:
-        pages["prev_url"] = url_for(
-            request.endpoint,
-            page=p.prev_num,
-            per_page=per_page,
-            expanded=1,
-            _external=True,
-        )
-    else:
-        pages["prev_url"] = None
-    if p.has_next:
-        pages["next_url"] = url_for(
-            request.endpoint,
-            page=p.next_num,
-            per_page=per_page,
-            expanded=1,
-            _external=True,
-        )
-    else:
-        pages["next_url"] = None
-    pages["first_url"] = url_for(
-        request.endpoint, page=1, per_page=per_page, expanded=1, _external=True
-    )
-    pages["last_url"] = url_for(
-        request.endpoint, page=p.pages, per_page=per_page, expanded=1, _external=True
-    )
-    return pages, p.items
+    return build_pages_dict(p, page, per_page, total_strategy), p.items
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+Registry of model export capabilities used by the json and paginate decorators.
+
+A model may declare `export_accepts_expand = True/False` to skip signature
+introspection entirely, and a static `prepare_export(items)` hook to prefetch
+whatever export_data() needs for a whole page of items at once.
+"""
+import inspect
+from collections import namedtuple
+
+ExportSpec = namedtuple('ExportSpec', ['accepts_expand', 'prepare_export'])
+
+_registry = {}
+
+
+def resolve_export_spec(model_class):
+    accepts_expand = getattr(model_class, 'export_accepts_expand', None)
+    if accepts_expand is None:
+        accepts_expand = 'expand' in inspect.getfullargspec(model_class.export_data).args
+    return ExportSpec(accepts_expand, getattr(model_class, 'prepare_export', None))
+
+
+def register_models(*model_classes):
+    for model_class in model_classes:
+        _registry[model_class] = resolve_export_spec(model_class)
+
+
+def get_export_spec(model_class):
+    spec = _registry.get(model_class)
+    if spec is None:
+        spec = _registry[model_class] = resolve_export_spec(model_class)
+    return spec
+
+
+def export_item(item, expand=None):
+    """
+    Export single item, `expand` is passed whenever export_data() accepts it.
+    """
+    if get_export_spec(type(item)).accepts_expand:
+        return item.export_data(expand=expand)
+    return item.export_data()
+
+
+def export_items(items, expand=None):
+    """
+    Export a page of items. Capabilities are looked up once per model class
+    and prepare_export() hooks run once for the page. `expand` is passed only
+    if given and accepted.
+    """
+    specs = {}
+    for model_class in {type(item) for item in items}:
+        spec = specs[model_class] = get_export_spec(model_class)
+        if spec.prepare_export:
+            spec.prepare_export([item for item in items if type(item) is model_class])
+    if not expand:
+        return [item.export_data() for item in items]
+    return [
+        item.export_data(expand=expand) if specs[type(item)].accepts_expand else item.export_data()
+        for item in items
+    ]
@@ -1,5 +1,5 @@
 from elar import db
-from flask import url_for
+from elar.common.db.paginate import PageLinks, build_pages_dict, paginate_query
 
 from elar.models import AccountingAccount
 from sqlalchemy.sql.functions import concat
@@ -55,28 +55,12 @@ def query_accounting_accounts(
 
     # paging
     # page = request.args.get('page', 1, type=int)
-    p = query.paginate(page, per_page)
-    pages = {"page": page, "per_page": per_page, "total": p.total, "pages": p.pages}
-    if p.has_prev:
-        pages["prev_url"] = url_for(
-            endpoint, page=p.prev_num, per_page=per_page, expanded=1, _external=True
-        )
-    else:
-        pages["prev_url"] = None
-    if p.has_next:
-        pages["next_url"] = url_for(
-            endpoint, page=p.next_num, per_page=per_page, expanded=1, _external=True
-        )
-    else:
-        pages["next_url"] = None
-    pages["first_url"] = url_for(
-        endpoint, page=1, per_page=per_page, expanded=1, _external=True
-    )
-    pages["last_url"] = url_for(
-        endpoint, page=p.pages, per_page=per_page, expanded=1, _external=True
-    )
+    p, total_strategy = paginate_query(query, page, per_page)
+    links = PageLinks(endpoint=endpoint, per_page=per_page, expanded=1, client_account_id=client_account_id)
+    pages = build_pages_dict(p, page, per_page, total_strategy, links)
 
     result2 = [r._asdict() for r in p.items]
     return {
         "accounting_accounts": result2,
+        "pages": pages,
     }
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime
+
+from sqlalchemy import text
+
+from elar import db
+from elar.models import CeleryHistory
+
+HISTORY_TABLE = CeleryHistory.__tablename__
+
+
+def month_start(value, months=0):
+    month = value.month - 1 + months
+    return datetime(value.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{HISTORY_TABLE}_y{month.year}m{month.month:02d}'
+
+
+def insert_task_history(rows):
+    """
+    Write buffered (task_name, task_timestamp) rows with a single multi-row
+    INSERT. Runs on its own connection so it never touches the session
+    (and the transaction) of the task being executed.
+    """
+    if not rows:
+        return 0
+    with db.engine.begin() as connection:
+        connection.execute(CeleryHistory.__table__.insert().values([
+            {'task_name': task_name, 'task_timestamp': task_timestamp}
+            for task_name, task_timestamp in rows
+        ]))
+    return len(rows)
+
+
+def ensure_history_partitions(months_ahead=2, now=None):
+    """
+    Create monthly partitions from the current month up to `months_ahead`
+    months ahead. Rows outside of any partition land in the default one,
+    which must stay empty for the months created here, so this has to run
+    well before the month starts.
+    """
+    now = now or datetime.utcnow()
+    created = []
+    for months in range(months_ahead + 1):
+        start = month_start(now, months)
+        name = partition_name(start)
+        exists = db.session.execute(text("SELECT to_regclass(:name)"), {'name': name}).scalar()
+        if exists is None:
+            db.session.execute(text(
+                f"CREATE TABLE {name} PARTITION OF {HISTORY_TABLE} "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{month_start(start, 1).isoformat()}')"
+            ))
+            created.append(name)
+    db.session.commit()
+    return created
+
+
+def drop_history_partitions(retention_months, now=None):
+    """
+    Drop the monthly partitions older than `retention_months` months,
+    which is a metadata operation instead of a DELETE leaving a bloated heap.
+    """
+    oldest = partition_name(month_start(now or datetime.utcnow(), -retention_months))
+    rows = db.session.execute(text("""
+        SELECT child.relname FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = :table AND child.relname ~ '_y[0-9]{4}m[0-9]{2}$'
+    """), {'table': HISTORY_TABLE})
+    dropped = sorted(name for name, in rows if name < oldest)
+    for name in dropped:
+        db.session.execute(text(f"DROP TABLE {name}"))
+    db.session.commit()
+    return dropped
@@ -1,5 +1,6 @@
 from .user_manager import UserManager
 from .client_account_manager import ClientAccountManager
+from .sequence_manager import SequenceManager, SequenceBlock
 
 
-__all__ = ['UserManager', 'ClientAccountManager']
+__all__ = ['UserManager', 'ClientAccountManager', 'SequenceManager', 'SequenceBlock']
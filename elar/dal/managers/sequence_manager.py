@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+from sqlalchemy import text
+
+from elar import db
+from elar.common.exceptions import ValidationError
+from elar.models import ClientAccountSequenceGap
+
+# sequence kind: (legacy sb_client_accounts column, first number)
+SEQUENCE_KINDS = {
+    'general': ('sequence_number', 1),
+    'recon': ('recon_seq_num', 1),
+    'sale_invoice': ('sale_invoice_seq_number', 10000),
+    'purchase_invoice': ('purchase_invoice_seq_number', 20000),
+    'sale_credit_note': ('sale_credit_notes_seq_number', 10000),
+    'purchase_credit_note': ('purchase_credit_notes_seq_number', 20000),
+    'receipt': ('receipt_seq_number', 10000),
+    'payment': ('payment_seq_number', 20000),
+}
+
+# one statement both seeds a missing counter from the legacy column and
+# advances an existing one, only the narrow counter row gets locked
+_ALLOCATE_STATEMENTS = {
+    kind: text(f"""
+        INSERT INTO sb_client_account_sequences (client_account_id, kind, last_value)
+        SELECT id, :kind, COALESCE({column}, {start - 1}) + :n
+        FROM sb_client_accounts WHERE id = :client_account_id
+        ON CONFLICT (client_account_id, kind)
+        DO UPDATE SET last_value = sb_client_account_sequences.last_value + :n
+        RETURNING last_value
+    """)
+    for kind, (column, start) in SEQUENCE_KINDS.items()
+}
+
+
+class SequenceManager:
+    @staticmethod
+    def allocate(client_account_id, kind, n=1, bind=None):
+        """
+        Advance the counter by n and return the last allocated number,
+        the allocated block is last - n + 1 .. last.
+
+        By default runs in the current session, so the numbers are given
+        back on rollback and the counter row stays locked until commit.
+        With `bind` (engine) the block is committed right away instead.
+        """
+        if kind not in _ALLOCATE_STATEMENTS:
+            raise ValidationError(f'Unknown sequence kind {kind}')
+        params = {'client_account_id': client_account_id, 'kind': kind, 'n': n}
+        if bind is None:
+            last = db.session.execute(_ALLOCATE_STATEMENTS[kind], params).scalar()
+        else:
+            with bind.begin() as connection:
+                last = connection.execute(_ALLOCATE_STATEMENTS[kind], params).scalar()
+        if last is None:
+            raise ValidationError(f'Client account {client_account_id} not found')
+        return last
+
+    @staticmethod
+    def next_value(client_account_id, kind):
+        return SequenceManager.allocate(client_account_id, kind)
+
+    @staticmethod
+    def reserve_range(client_account_id, kind, n, bind=None):
+        """
+        Reserve n contiguous numbers in one statement, returns them as range.
+        Numbers the caller ends up not using must be given to release_range().
+        """
+        if n < 1:
+            raise ValidationError('At least one number must be reserved')
+        last = SequenceManager.allocate(client_account_id, kind, n, bind=bind)
+        return range(last - n + 1, last + 1)
+
+    @staticmethod
+    def release_range(client_account_id, kind, first_value, last_value, bind=None):
+        """
+        Record reserved but unused numbers first_value .. last_value as a gap.
+        """
+        if first_value > last_value:
+            return
+        gap = {
+            'client_account_id': client_account_id,
+            'kind': kind,
+            'first_value': first_value,
+            'last_value': last_value,
+        }
+        if bind is None:
+            db.session.add(ClientAccountSequenceGap(**gap))
+        else:
+            with bind.begin() as connection:
+                connection.execute(ClientAccountSequenceGap.__table__.insert(), gap)
+
+
+class SequenceBlock:
+    """
+    Hands out numbers from blocks pre-allocated `block_size` at a time,
+    for bulk imports. Every block is committed in its own short
+    transaction, so a long import neither holds the counter lock nor
+    round-trips per document. Numbers left in the last block are
+    recorded as a gap by release().
+    """
+
+    def __init__(self, client_account_id, kind, block_size=100):
+        self.client_account_id = client_account_id
+        self.kind = kind
+        self.block_size = block_size
+        self._next = 1
+        self._last = 0
+
+    def next(self):
+        if self._next > self._last:
+            block = SequenceManager.reserve_range(self.client_account_id, self.kind, self.block_size, bind=db.engine)
+            self._next, self._last = block.start, block.stop - 1
+        value = self._next
+        self._next += 1
+        return value
+
+    def release(self):
+        SequenceManager.release_range(self.client_account_id, self.kind, self._next, self._last, bind=db.engine)
+        self._next = 1
+        self._last = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.release()
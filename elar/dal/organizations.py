@@ -1,5 +1,5 @@
 from elar import db
-from flask import request, url_for
+from flask import request
 from elar.models import Organization
 from sqlalchemy import or_
 import re
@@ -44,38 +44,8 @@ def query_organizations(per_page=25):
     ))
     query = query.order_by(Organization.parent_organization_number.desc(), Organization.organization_number)
 
-    if description:
-        # paging
-        page = request.args.get('page', 1, type=int)
-
-        p = query.paginate(page, per_page)
-        pages = {'page': page, 'per_page': per_page,
-                 'total': p.total, 'pages': p.pages}
-        if p.has_prev:
-            pages['prev_url'] = url_for(request.endpoint, page=p.prev_num,
-                                        per_page=per_page,
-                                        expanded=1, _external=True)
-        else:
-            pages['prev_url'] = None
-        if p.has_next:
-            pages['next_url'] = url_for(request.endpoint, page=p.next_num,
-                                        per_page=per_page,
-                                        expanded=1, _external=True)
-        else:
-            pages['next_url'] = None
-        pages['first_url'] = url_for(request.endpoint, page=1,
-                                     per_page=per_page, expanded=1,
-                                     _external=True)
-        pages['last_url'] = url_for(request.endpoint, page=p.pages,
-                                    per_page=per_page, expanded=1,
-                                    _external=True)
-        return {
-            'organizations': p.items
-            # 'pages': pages
-        }
-    else:
-        page = request.args.get('page', 1, type=int)
-        query = query.limit(per_page).offset((page - 1) * per_page)
-        return {
-            'organizations': query.all(),
-        }
+    page = request.args.get('page', 1, type=int)
+    query = query.limit(per_page).offset((page - 1) * per_page)
+    return {
+        'organizations': query.all(),
+    }
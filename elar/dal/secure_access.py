@@ -1,5 +1,5 @@
 from flask import g
-from sqlalchemy import func
+from sqlalchemy import case, func, true
 from elar import db
 from elar.common.exceptions import ValidationError
 from elar.models import (
@@ -25,6 +25,50 @@ def res_403():
     }, 403
 
 
+def resolve_eligible_client_ids(user_id, app=None):
+    """
+    Ids of client accounts the user may access, computed in a single statement:
+    active memberships UNION clients contracted by any of the user's accounts.
+    Mobile app users and users whose first membership has the client role (CA)
+    see contracts by client_account_id, everybody else by accounting_client_account_id.
+    """
+    memberships = (
+        db.session.query(
+            ClientAccountUser.id,
+            ClientAccountUser.client_account_id,
+            ClientAccountUser.role_id,
+            ClientAccountUser.is_active,
+        )
+        .filter(ClientAccountUser.user_id == user_id)
+        .cte("memberships")
+    )
+    if app == "mobile":
+        is_client = true()
+    else:
+        first_role_is_client = (
+            db.session.query(memberships.c.role_id == 3)
+            .order_by(memberships.c.id)
+            .limit(1)
+            .as_scalar()
+        )
+        is_client = func.coalesce(first_role_is_client, False)
+    linked_account_id = case(
+        [(is_client, Contract.client_account_id)],
+        else_=Contract.accounting_client_account_id,
+    )
+
+    members = db.session.query(memberships.c.client_account_id).filter(
+        memberships.c.is_active.is_(True),
+        memberships.c.client_account_id.isnot(None),
+    )
+    contracted = (
+        db.session.query(Contract.client_account_id)
+        .join(memberships, memberships.c.client_account_id == linked_account_id)
+        .filter(Contract.client_account_id.isnot(None))
+    )
+    return [row[0] for row in members.union(contracted).all()]
+
+
 def secure_get_user(user_id):
     eligible_clients = set(g.eligible_clients)
     # logger.error(f'___ eligible_clients {eligible_clients}')
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime
+
+from sqlalchemy.dialects.postgresql import insert
+
+from elar import db
+from elar.models import TemperatureSensorMeasurement
+
+
+def insert_measurements(rows):
+    """
+    Write validated measurement rows with a single multi-row INSERT.
+    Readings already stored (a retried or re-sent batch) are skipped.
+    Returns the number of inserted rows.
+    """
+    if not rows:
+        return 0
+    created_at = datetime.utcnow()
+    statement = (
+        insert(TemperatureSensorMeasurement.__table__)
+        .values([dict(row, created_at=created_at) for row in rows])
+        .on_conflict_do_nothing(constraint="uq_sb_temperature_sensor_measurements_sensor_id_measured_at")
+    )
+    inserted = db.session.execute(statement).rowcount
+    db.session.commit()
+    return inserted
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+import calendar
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, text
+
+from elar import db
+from elar.models import TaskDefinition
+from elar.models.task import RepeatUnits, TaskNotificationMethods
+
+# notifications for every active member of every active client account,
+# rows already scheduled by an earlier (or concurrent) tick are skipped
+INSERT_NOTIFICATIONS = text("""
+    INSERT INTO sb_task_notifications (
+        created_at, created_by_id, task_id, client_account_id, user_id,
+        task_due_date, notification_number, notification_method, notification_date
+    )
+    SELECT now(), :created_by_id, o.task_id, cau.client_account_id, cau.user_id,
+           o.due_date, o.notification_number, :method, o.notification_date
+    FROM unnest(
+        CAST(:task_ids AS bigint[]),
+        CAST(:due_dates AS timestamp[]),
+        CAST(:notification_numbers AS integer[]),
+        CAST(:notification_dates AS timestamptz[])
+    ) AS o(task_id, due_date, notification_number, notification_date)
+    CROSS JOIN sb_client_account_users cau
+    JOIN sb_client_accounts ca ON ca.id = cau.client_account_id
+    WHERE cau.is_active IS TRUE AND ca.active IS TRUE
+    ON CONFLICT ON CONSTRAINT uq_sb_task_notifications_occurrence DO NOTHING
+""")
+
+
+def add_months(value, months):
+    month = value.month - 1 + months
+    year = value.year + month // 12
+    month = month % 12 + 1
+    return value.replace(year=year, month=month, day=min(value.day, calendar.monthrange(year, month)[1]))
+
+
+def occurrence(definition, index):
+    """
+    Due date of the index-th repetition, always computed from the first
+    due date so that month ends do not drift (31.01 -> 28.02 -> 31.03).
+    """
+    step = (definition.repeat_frequency or 1) * index
+    if definition.repeat_unit == RepeatUnits.DAY.value:
+        return definition.due_date + timedelta(days=step)
+    if definition.repeat_unit == RepeatUnits.MONTH.value:
+        return add_months(definition.due_date, step)
+    if definition.repeat_unit == RepeatUnits.YEAR.value:
+        return add_months(definition.due_date, 12 * step)
+    return definition.due_date if index == 0 else None
+
+
+def occurrence_index(definition, due_date):
+    """
+    Index of the first occurrence not earlier than due_date.
+    """
+    if definition.repeat_unit not in (RepeatUnits.DAY.value, RepeatUnits.MONTH.value, RepeatUnits.YEAR.value):
+        return 0
+    frequency = definition.repeat_frequency or 1
+    base = definition.due_date
+    if definition.repeat_unit == RepeatUnits.DAY.value:
+        index = (due_date - base).days // frequency
+    else:
+        months = (due_date.year - base.year) * 12 + due_date.month - base.month
+        index = months // (frequency * (12 if definition.repeat_unit == RepeatUnits.YEAR.value else 1))
+    index = max(0, index - 1)
+    while occurrence(definition, index) < due_date:
+        index += 1
+    return index
+
+
+def expand_definition(definition, window_start, window_end):
+    """
+    Occurrences of the definition due from its next_due_date (due_date if
+    not set yet, but not before window_start) up to window_end as (due
+    date, notification number, notification date) and the first due date
+    left for a later tick (None when there is none). Past occurrences are
+    skipped, not notified late.
+    """
+    offsets = [
+        (number, notification_date - definition.due_date)
+        for number, notification_date in ((1, definition.notification1_date), (2, definition.notification2_date))
+        if notification_date is not None
+    ]
+    start = max(definition.next_due_date or definition.due_date, window_start)
+    index = occurrence_index(definition, start)
+    due_date = occurrence(definition, index)
+    while due_date is not None and due_date < start:
+        index += 1
+        due_date = occurrence(definition, index)
+    rows = []
+    while due_date is not None and due_date <= window_end:
+        if definition.active_to and due_date.date() > definition.active_to:
+            return rows, None
+        if not definition.active_from or due_date.date() >= definition.active_from:
+            rows.extend((due_date, number, due_date + offset) for number, offset in offsets)
+        index += 1
+        due_date = occurrence(definition, index)
+    if due_date is not None and definition.active_to and due_date.date() > definition.active_to:
+        due_date = None
+    return rows, due_date
+
+
+def schedule_task_notifications(horizon, now=None, created_by_id=1, method=TaskNotificationMethods.EMAIL.value):
+    """
+    One scheduler tick: expand occurrences due between now and now +
+    `horizon` into notifications. Only unfinished definitions whose next
+    due date (due_date when next_due_date was never set, e.g. rows inserted
+    with plain SQL) falls before the end of the window are read, and all
+    notifications are written by a single INSERT ... ON CONFLICT.
+    Returns the number of scheduled (occurrence, notification number) pairs.
+    """
+    now = now or datetime.utcnow()
+    window_end = now + horizon
+    definitions = (
+        TaskDefinition.query
+        .filter(TaskDefinition.schedule_finished.is_(False))
+        .filter(func.coalesce(TaskDefinition.next_due_date, TaskDefinition.due_date) <= window_end)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    occurrences = []
+    for definition in definitions:
+        rows, definition.next_due_date = expand_definition(definition, now, window_end)
+        definition.schedule_finished = definition.next_due_date is None
+        occurrences.extend((definition.id, *row) for row in rows)
+
+    if occurrences:
+        task_ids, due_dates, notification_numbers, notification_dates = map(list, zip(*occurrences))
+        db.session.execute(INSERT_NOTIFICATIONS, {
+            'created_by_id': created_by_id,
+            'method': method,
+            'task_ids': task_ids,
+            'due_dates': due_dates,
+            'notification_numbers': notification_numbers,
+            'notification_dates': notification_dates,
+        })
+    db.session.commit()
+    return len(occurrences)
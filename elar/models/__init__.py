@@ -4,6 +4,7 @@ from .users import User
 from .roles import Role
 from .client_account import ClientAccount
 from .client_account_users import ClientAccountUser
+from .client_account_sequence import ClientAccountSequence, ClientAccountSequenceGap
 from .accounting_accounts import AccountingAccount
 from .contracts import Contract
 from .calendar import Calendar
@@ -12,6 +13,8 @@ from .celery_history import CeleryHistory
 from .task import TaskDefinition, TaskResult, TaskNotification
 from .citizens import Citizens
 from .citizen_status import CitizenStatus
+from .temperature_sensor_measurement import TemperatureSensorMeasurement
+from elar.common.serialization import register_models
 
 __all__ = [
     "Organization",
@@ -19,6 +22,8 @@ __all__ = [
     "User",
     "ClientAccount",
     "ClientAccountUser",
+    "ClientAccountSequence",
+    "ClientAccountSequenceGap",
     "AccountingAccount",
     "Contract",
     "Calendar",
@@ -28,5 +33,21 @@ __all__ = [
     "TaskResult",
     "TaskNotification",
     "Citizens",
-    "CitizenStatus"
+    "CitizenStatus",
+    "TemperatureSensorMeasurement",
 ]
+
+
+register_models(
+    Organization,
+    User,
+    Role,
+    ClientAccount,
+    AccountingAccount,
+    Contract,
+    Calendar,
+    CeleryHistory,
+    Citizens,
+    CitizenStatus,
+    TemperatureSensorMeasurement,
+)
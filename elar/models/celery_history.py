@@ -3,10 +3,14 @@ from elar import db
 
 
 class CeleryHistory(db.Model):  # type: ignore
+    """
+    Partitioned by month on task_timestamp (see migration 202210181700),
+    which is why it is part of the primary key.
+    """
     __tablename__: str = 'sb_celery_history'
     id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
     task_name = db.Column(db.String(40), nullable=False)
-    task_timestamp = db.Column(db.DateTime, nullable=False)
+    task_timestamp = db.Column(db.DateTime, primary_key=True, nullable=False)
 
     def export_data(self):
         return {
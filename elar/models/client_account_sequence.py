@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime
+
+from elar import db
+
+
+class ClientAccountSequence(db.Model):  # type: ignore
+    """
+    Last allocated document number per client account and sequence kind.
+    Replaces the *_seq_number columns of sb_client_accounts, which are
+    only read once to seed a missing counter.
+    """
+    __tablename__: str = "sb_client_account_sequences"
+    client_account_id = db.Column(
+        db.BigInteger, db.ForeignKey("sb_client_accounts.id", ondelete="CASCADE"), primary_key=True
+    )
+    kind = db.Column(db.String(32), primary_key=True)
+    last_value = db.Column(db.BigInteger, nullable=False)
+
+
+class ClientAccountSequenceGap(db.Model):  # type: ignore
+    """
+    Reserved numbers that were never used, kept so that every hole in
+    document numbering can be accounted for.
+    """
+    __tablename__: str = "sb_client_account_sequence_gaps"
+    id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    client_account_id = db.Column(
+        db.BigInteger, db.ForeignKey("sb_client_accounts.id", ondelete="CASCADE"), nullable=False
+    )
+    kind = db.Column(db.String(32), nullable=False)
+    first_value = db.Column(db.BigInteger, nullable=False)
+    last_value = db.Column(db.BigInteger, nullable=False)
+    created_at = db.Column(db.DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index("ix_sb_client_account_sequence_gaps_client_account_id_kind", "client_account_id", "kind"),
+    )
+
+    def export_data(self):
+        return {
+            "client_account_id": self.client_account_id,
+            "kind": self.kind,
+            "first_value": self.first_value,
+            "last_value": self.last_value,
+            "created_at": self.created_at,
+        }
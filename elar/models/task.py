@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 from enum import Enum
+from sqlalchemy import event, inspect
 from elar import db
 from .timestamp_mixin import TimestampMixin
 
@@ -32,6 +33,38 @@ class TaskDefinition(TimestampMixin, db.Model):  # type: ignore
     notification2_date = db.Column(db.DateTime)
     repeat_frequency = db.Column(db.Integer)
     repeat_unit = db.Column(db.String(10))
+    # first due date not expanded into notifications yet, due_date when NULL
+    next_due_date = db.Column(
+        db.DateTime, default=lambda context: context.get_current_parameters().get("due_date")
+    )
+    # set by the scheduler once there are no more occurrences
+    schedule_finished = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+
+    __table_args__ = (
+        db.Index(
+            "ix_sb_task_definitions_next_due_date", db.func.coalesce(next_due_date, due_date),
+            postgresql_where=schedule_finished.is_(False),
+        ),
+    )
+
+
+SCHEDULE_FIELDS = (
+    "due_date", "repeat_frequency", "repeat_unit", "active_from", "active_to",
+    "notification1_date", "notification2_date",
+)
+
+
+@event.listens_for(TaskDefinition, "before_update")
+def reset_schedule(mapper, connection, target):
+    """
+    A definition whose schedule changed is expanded again from its first
+    due date. Past occurrences are skipped by the scheduler and the ones
+    already notified by the unique constraint.
+    """
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in SCHEDULE_FIELDS):
+        target.next_due_date = target.due_date
+        target.schedule_finished = False
 
 
 class TaskNotification(TimestampMixin, db.Model):  # type: ignore
@@ -49,6 +82,14 @@ class TaskNotification(TimestampMixin, db.Model):  # type: ignore
     notification_method = db.Column(db.String(20))
     notification_date = db.Column(db.DateTime(timezone=True))
 
+    __table_args__ = (
+        db.UniqueConstraint(
+            "task_id", "client_account_id", "user_id", "task_due_date", "notification_number",
+            name="uq_sb_task_notifications_occurrence",
+        ),
+        db.Index("ix_sb_task_notifications_notification_date", "notification_date"),
+    )
+
 
 class TaskResult(TimestampMixin, db.Model):  # type: ignore
     __tablename__: str = "sb_task_results"
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime
+
+from elar import db
+
+
+class TemperatureSensorMeasurement(db.Model):  # type: ignore
+    """
+    Raw sensor reading, written in batches by TemperatureSensorBatchTask.
+    """
+    __tablename__: str = "sb_temperature_sensor_measurements"
+    id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    sensor_id = db.Column(db.BigInteger, nullable=False)
+    value = db.Column(db.Float, nullable=False)
+    measured_at = db.Column(db.DateTime, nullable=False)
+    created_at = db.Column(db.DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint(
+            "sensor_id", "measured_at", name="uq_sb_temperature_sensor_measurements_sensor_id_measured_at"
+        ),
+    )
+
+    def export_data(self):
+        return {
+            "id": self.id,
+            "sensor_id": self.sensor_id,
+            "value": self.value,
+            "measured_at": self.measured_at,
+        }
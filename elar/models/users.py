@@ -2,6 +2,7 @@
 import logging
 import hashlib
 import re
+import time
 from datetime import datetime
 from typing import Iterable
 from elar.utils.string_utils import escape_str
@@ -12,11 +13,12 @@ from itsdangerous import (
     BadSignature,
 )
 from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy.orm import joinedload, make_transient_to_detached
 from elar import db
 from .contracts import Contract
 from .timestamp_mixin import TimestampMixin
 from elar.common.exceptions import ValidationError
-from ..utils.s3_tools import create_presigned_url
+from ..utils.s3_tools import create_presigned_urls, get_presigned_url
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +41,17 @@ class User(TimestampMixin, db.Model):  # type: ignore
     reset_password_counter_date = db.Column(db.DateTime, nullable=True)
 
     EXPIRES_IN = 3600  # time expires in seconds
+    PROFILE_IMAGE_URL_EXPIRATION = 518400  # can't be higher that 7 days
+    SNAPSHOT_FIELDS = (
+        "id",
+        "first_name",
+        "last_name",
+        "email",
+        "email_verified",
+        "phone",
+        "profile_image_url",
+        "profile_image_key",
+    )
 
     client_accounts = db.relationship(
         "ClientAccount",
@@ -185,18 +198,39 @@ class User(TimestampMixin, db.Model):  # type: ignore
             ],
         }
 
+    def query_memberships(self):
+        """
+        ClientAccountUser rows of the user with account, its organization and
+        role loaded in the same query.
+        """
+        from elar.models import ClientAccountUser, ClientAccount
+
+        return (
+            ClientAccountUser.query.options(
+                joinedload(ClientAccountUser.account).joinedload(
+                    ClientAccount.organization
+                ),
+                joinedload(ClientAccountUser.role),
+            )
+            .filter(ClientAccountUser.user_id == self.id)
+            .all()
+        )
+
     # new version of export_data() function. Faster.
+    # Runs two queries (memberships and contracts) whatever the number of accounts is.
     def export_data(self, app=None, expand: Iterable[str] = ["accounts", "contracts"]):
-        from elar.models import ClientAccountUser, ClientAccount
+        from elar.models import ClientAccount
 
-        user_accounts = ClientAccountUser.query.filter(
-            ClientAccountUser.user_id == self.id
-        ).all()
-        user_accounts_ = [user_account.account.id for user_account in user_accounts]
+        user_accounts = self.query_memberships()
+        user_accounts_ = [
+            user_account.client_account_id for user_account in user_accounts
+        ]
         isclient = False
         if user_accounts:
             isclient = user_accounts[0].role_id == 3
-        if app == "mobile" or isclient:
+        if not user_accounts_:
+            contracts = []
+        elif app == "mobile" or isclient:
             contracts = (
                 db.session.query(Contract, ClientAccount)
                 .join(ClientAccount, Contract.client_account_id == ClientAccount.id)
@@ -216,10 +250,10 @@ class User(TimestampMixin, db.Model):  # type: ignore
             "last_name": self.last_name,
             "email": self.email,
             "email_verified": self.email_verified,
-            "profile_image_url": create_presigned_url(
+            "profile_image_url": get_presigned_url(
                 bucket_name=current_app.config["UPLOAD_DOC_S3_BUCKET"],
                 object_name=self.profile_image_key,
-                expiration=518400,  # can't be higher that 7 days
+                expiration=self.PROFILE_IMAGE_URL_EXPIRATION,
             )
             if self.profile_image_key
             else None,
@@ -235,7 +269,7 @@ class User(TimestampMixin, db.Model):  # type: ignore
                 for user_account in user_accounts
             ]
 
-        if not expand or ("contracts" in expand and contracts):
+        if not expand or "contracts" in expand:
             res["contracts"] = [
                 {
                     "contract_id": c[0].id,
@@ -251,13 +285,25 @@ class User(TimestampMixin, db.Model):  # type: ignore
 
         return res
 
+    @staticmethod
+    def prepare_export(users):
+        """
+        Sign profile image urls of a page of users in one batch,
+        export_data() then takes them from the presigned url cache.
+        """
+        create_presigned_urls(
+            bucket_name=current_app.config["UPLOAD_DOC_S3_BUCKET"],
+            object_names=[user.profile_image_key for user in users if user.profile_image_key],
+            expiration=User.PROFILE_IMAGE_URL_EXPIRATION,
+        )
+
     def export_profile_image(self):
         res = {
             "self_url": self.get_url(),
-            "profile_image_url": create_presigned_url(
+            "profile_image_url": get_presigned_url(
                 bucket_name=current_app.config["UPLOAD_DOC_S3_BUCKET"],
                 object_name=self.profile_image_key,
-                expiration=518400,  # can't be higher that 7 days
+                expiration=self.PROFILE_IMAGE_URL_EXPIRATION,
             )
             if self.profile_image_key
             else None,
@@ -321,6 +367,22 @@ class User(TimestampMixin, db.Model):  # type: ignore
             ],
         }
 
+    def export_snapshot(self):
+        """
+        Plain dict of the columns needed to rebuild the user without a query.
+        """
+        return {field: getattr(self, field) for field in self.SNAPSHOT_FIELDS}
+
+    @staticmethod
+    def from_snapshot(snapshot):
+        """
+        Attach user rebuilt from export_snapshot() to the session without a query.
+        Columns missing in the snapshot are loaded on first access.
+        """
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+
     def import_data(self, data):
         try:
             props = [
@@ -410,8 +472,33 @@ class User(TimestampMixin, db.Model):  # type: ignore
             "email_verified": self.email_verified,
             "token_type": "access_token",
         }
+        if current_app.config.get("SCOPED_ACCESS_TOKENS") is True:
+            tmp.update(self.export_token_scopes())
         return s.dumps(tmp).decode("utf-8")
 
+    def export_token_scopes(self):
+        """
+        Eligible client accounts to embed into access token, stamped with
+        the authz version they were resolved at. Nothing when they do not
+        fit into the token. Changes the authz version does not see (made
+        outside the ORM) are trusted until the scopes expire after
+        SCOPED_ACCESS_TOKEN_SCOPES_TTL seconds, the token itself stays
+        valid and is then authorized from the DB.
+        """
+        from elar.authorization import encode_client_scopes
+        from elar.dal.secure_access import resolve_eligible_client_ids
+
+        # read the version first: a change racing with resolving makes it stale
+        authz_version = current_app.redis.get_authz_version(self.id)
+        scopes = encode_client_scopes(resolve_eligible_client_ids(self.id))
+        if scopes is None:
+            return {}
+        return {
+            "authz_version": authz_version,
+            "scopes": scopes,
+            "scopes_expire": int(time.time()) + current_app.config.get("SCOPED_ACCESS_TOKEN_SCOPES_TTL", 300),
+        }
+
     def generate_refresh_token(self, expires_in=3600):
         """
         Generate refresh token for this user.
@@ -496,18 +583,18 @@ class User(TimestampMixin, db.Model):  # type: ignore
         return {"status": True}
 
     @staticmethod
-    def verify_auth_token(token):
+    def load_token_data(token, token_type):
         """
-        verify auth token, load data from db to g.
+        verify auth or refresh token signature and type, return its payload.
         """
         s = Serializer(current_app.config["SECRET_KEY"])
         try:
             data = s.loads(token)
             if data["email_verified"] is not True:
                 raise ValidationError("Unverified email address")
-            if data["token_type"] != "access_token":
-                raise ValidationError("Not an access token")
-            return User.query.get(data["user_id"])
+            if data["token_type"] != token_type:
+                raise ValidationError(f"Unexpected token type {data['token_type']}")
+            return data
         except SignatureExpired:
             return None
         except BadSignature:
@@ -516,26 +603,21 @@ class User(TimestampMixin, db.Model):  # type: ignore
             return None
         return None
 
+    @staticmethod
+    def verify_auth_token(token):
+        """
+        verify auth token, load data from db to g.
+        """
+        data = User.load_token_data(token, "access_token")
+        return User.query.get(data["user_id"]) if data else None
+
     @staticmethod
     def verify_refresh_token(token):
         """
         verify refresh token, load data from db to g.
         """
-        s = Serializer(current_app.config["SECRET_KEY"])
-        try:
-            data = s.loads(token)
-            if data["email_verified"] is not True:
-                raise ValidationError("Unverified email address")
-            if data["token_type"] != "refresh_token":
-                raise ValidationError("Not a refresh token")
-            return User.query.get(data["user_id"])
-        except SignatureExpired:
-            return None
-        except BadSignature:
-            return None
-        except Exception:
-            return None
-        return None
+        data = User.load_token_data(token, "refresh_token")
+        return User.query.get(data["user_id"]) if data else None
 
     @staticmethod
     def verify_reset_password_token(token):
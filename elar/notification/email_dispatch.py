@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+from flask import current_app
+from flask_mail import Message
+
+EMAIL_DISPATCH_TASK = 'EmailDispatchTask'
+
+
+def email_payload(subject, recipients, html=None, body=None, sender=None):
+    """
+    Rendered email as JSON serializable dict, the unit handed to the worker.
+    """
+    return {
+        'subject': subject,
+        'recipients': list(recipients),
+        'html': html,
+        'body': body,
+        'sender': sender,
+    }
+
+
+def build_message(payload):
+    return Message(
+        payload['subject'],
+        recipients=payload['recipients'],
+        html=payload.get('html'),
+        body=payload.get('body'),
+        sender=payload.get('sender'),
+    )
+
+
+def enqueue_emails(payloads):
+    """
+    Send rendered emails from the worker, all of them in one task.
+    With MAIL_ASYNC disabled they are sent right away instead.
+    """
+    payloads = list(payloads)
+    if not payloads:
+        return
+    if not current_app.config.get('MAIL_ASYNC', True):
+        with current_app.mail.connect() as connection:
+            for payload in payloads:
+                connection.send(build_message(payload))
+        return
+    current_app.celery.send_task(EMAIL_DISPATCH_TASK, args=[payloads])
+
+
+def send_email(subject, recipients, html=None, body=None, sender=None):
+    enqueue_emails([email_payload(subject, recipients, html=html, body=body, sender=sender)])
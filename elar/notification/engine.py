@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+import json
+from email.utils import formataddr
+
+from flask import current_app
+
+from elar.common.exceptions import ValidationError
+from elar.notification.email_dispatch import email_payload, enqueue_emails
+from elar.notification.email_usecases import default_sections
+
+NOTIFICATION_TASK = 'NotificationTask'
+
+
+def index_usecases(sections):
+    return {item['trigger_name']: item for section in sections for item in section['items']}
+
+
+usecases_by_trigger = index_usecases(default_sections)
+
+
+def group_recipients(recipients):
+    """
+    Group (email, context) pairs by context, one group per distinct render.
+    """
+    groups = {}
+    for email, context in recipients:
+        key = json.dumps(context, sort_keys=True, default=str)
+        groups.setdefault(key, {'context': context, 'recipients': []})['recipients'].append(email)
+    return list(groups.values())
+
+
+class NotificationEngine():
+    """
+    Renders emails of the use-cases declared in email_usecases.
+    Subject and body templates are compiled once per trigger and every
+    distinct context is rendered once, however many recipients share it.
+    """
+
+    def __init__(self, env, usecases=None):
+        self.env = env
+        # subjects are plain text, not html
+        self.subject_env = env.overlay(autoescape=False)
+        self.usecases = usecases_by_trigger if usecases is None else usecases
+        self._templates = {}
+
+    def get_usecase(self, trigger_name):
+        usecase = self.usecases.get(trigger_name)
+        if usecase is None:
+            raise ValidationError(f'Unknown notification trigger {trigger_name}')
+        return usecase
+
+    def validate_context(self, usecase, context):
+        missing = [tag for tag in usecase.get('tags', []) if tag not in context]
+        if missing:
+            raise ValidationError(f'{usecase["trigger_name"]}: missing {", ".join(missing)}')
+
+    def _get_templates(self, trigger_name):
+        templates = self._templates.get(trigger_name)
+        if templates is None:
+            usecase = self.get_usecase(trigger_name)
+            body = (
+                self.env.get_template(usecase['template'])
+                if usecase.get('template_is_file')
+                else self.env.from_string(usecase['template'])
+            )
+            templates = self._templates[trigger_name] = (self.subject_env.from_string(usecase['subject']), body)
+        return templates
+
+    def render(self, trigger_name, context):
+        subject, body = self._get_templates(trigger_name)
+        return subject.render(**context), body.render(**context)
+
+    def build_payloads(self, trigger_name, groups):
+        usecase = self.get_usecase(trigger_name)
+        sender = formataddr((usecase.get('sender_name'), usecase['sender']))
+        payloads = []
+        for group in groups:
+            subject, html = self.render(trigger_name, group['context'])
+            payloads.extend(email_payload(subject, [email], html=html, sender=sender) for email in group['recipients'])
+        return payloads
+
+
+def notify(trigger_name, recipients):
+    """
+    Send use-case email to many (email, context) recipients in one
+    worker job. Returns number of addressed recipients, 0 when the
+    use-case is disabled.
+    """
+    engine = current_app.notification_engine
+    usecase = engine.get_usecase(trigger_name)
+    if not usecase.get('status', {}).get('enabled', True):
+        return 0
+    groups = group_recipients(recipients)
+    for group in groups:
+        engine.validate_context(usecase, group['context'])
+    if not current_app.config.get('MAIL_ASYNC', True):
+        enqueue_emails(engine.build_payloads(trigger_name, groups))
+    else:
+        current_app.celery.send_task(NOTIFICATION_TASK, args=[trigger_name, groups])
+    return sum(len(group['recipients']) for group in groups)
@@ -0,0 +1,4 @@
+from .measurements import MEASUREMENT_BATCH_TASK, record_measurement, validate_measurements
+
+
+__all__ = ['MEASUREMENT_BATCH_TASK', 'record_measurement', 'validate_measurements']
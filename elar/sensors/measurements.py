@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+
+from elar.utils.batch_buffer import BatchBuffer
+
+MEASUREMENT_BATCH_TASK = 'TemperatureSensorBatchTask'
+
+
+def parse_timestamp(value):
+    """
+    Naive UTC datetime of a reading timestamp given as datetime,
+    ISO 8601 string or unix epoch seconds.
+    """
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        value = datetime.fromtimestamp(value, timezone.utc)
+    elif not isinstance(value, datetime):
+        raise TypeError(f'Invalid timestamp {value!r}')
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _sensor_id(value):
+    return value if type(value) is int and value > 0 else None
+
+
+def _value(value, min_value, max_value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    # NaN fails both comparisons
+    return float(value) if min_value <= value <= max_value else None
+
+
+def _timestamp(value, latest):
+    try:
+        value = parse_timestamp(value)
+    except (TypeError, ValueError, OverflowError, OSError):
+        return None
+    return value if value <= latest else None
+
+
+def validate_measurements(readings, min_value, max_value, max_clock_skew=timedelta(minutes=5), now=None):
+    """
+    Validate a batch of (sensor_id, value, timestamp) readings column by
+    column instead of reading by reading. Invalid readings are dropped, of
+    several readings of one sensor at the same moment the last one wins.
+    Returns the rows to insert and the number of dropped readings.
+    """
+    readings = list(readings)
+    well_formed = [reading for reading in readings if isinstance(reading, (list, tuple)) and len(reading) == 3]
+    if not well_formed:
+        return [], len(readings)
+
+    latest = (now or datetime.utcnow()) + max_clock_skew
+    sensor_ids, values, timestamps = zip(*well_formed)
+    sensor_ids = [_sensor_id(sensor_id) for sensor_id in sensor_ids]
+    values = [_value(value, min_value, max_value) for value in values]
+    timestamps = [_timestamp(timestamp, latest) for timestamp in timestamps]
+
+    unique = {}
+    for sensor_id, value, timestamp in zip(sensor_ids, values, timestamps):
+        if sensor_id is not None and value is not None and timestamp is not None:
+            unique[(sensor_id, timestamp)] = value
+    rows = [
+        {'sensor_id': sensor_id, 'value': value, 'measured_at': timestamp}
+        for (sensor_id, timestamp), value in unique.items()
+    ]
+    return rows, len(readings) - len(rows)
+
+
+def enqueue_measurements(readings):
+    """
+    Hand coalesced readings to the worker as one task.
+    """
+    current_app.celery.send_task(MEASUREMENT_BATCH_TASK, args=[[
+        [sensor_id, value, timestamp.isoformat() if isinstance(timestamp, datetime) else timestamp]
+        for sensor_id, value, timestamp in readings
+    ]])
+
+
+# readings of the process coalesced for SENSOR_BATCH_WINDOW seconds (or
+# SENSOR_BATCH_SIZE readings), configured in create_app()
+measurement_batcher = BatchBuffer(enqueue_measurements)
+
+
+def record_measurement(sensor_id, value, timestamp=None):
+    """
+    Queue a reading, it is sent to the worker together with the other
+    readings coalesced by measurement_batcher.
+    """
+    measurement_batcher.add(sensor_id, value, timestamp or datetime.utcnow())
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+import itertools
+import json
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from elar.utils.ttl_cache import TTLCache
+
+_PENDING_KEY = 'auth_context_invalidate'
+
+
+class AuthContextCache():
+    """
+    Two level cache of the resolved per-user authorization context.
+
+    L1 is a small in-process LRU with a short TTL so that a hot user does not
+    hit Redis on every request. L2 is Redis, shared by all uwsgi and celery
+    workers. Entries are dropped after commits touching User,
+    ClientAccountUser or Contract rows (see register_invalidation_listeners),
+    which also bumps the users' authz version so that scopes embedded in
+    issued access tokens stop being trusted.
+    Other processes may keep serving their L1 copy for up to `local_ttl`.
+    """
+
+    KEY_PREFIX = 'auth_context:'
+
+    def __init__(self, redis_service, ttl=300, local_ttl=5, local_size=1024):
+        self.redis_service = redis_service
+        self.ttl = ttl
+        self._local = TTLCache(maxsize=local_size, ttl=local_ttl)
+
+    def _key(self, user_id):
+        return f'{self.KEY_PREFIX}{user_id}'
+
+    def get(self, user_id):
+        """
+        Return cached context of the user or None.
+        """
+        context = self._local.get(user_id)
+        if context is not None:
+            return context
+        data = self.redis_service.get(self._key(user_id))
+        if not data:
+            return None
+        context = json.loads(data)
+        self._local.set(user_id, context)
+        return context
+
+    def set(self, user_id, context):
+        self.redis_service.setex(self._key(user_id), self.ttl, json.dumps(context))
+        self._local.set(user_id, context)
+
+    def invalidate(self, user_ids):
+        user_ids = [user_id for user_id in user_ids if user_id is not None]
+        if not user_ids:
+            return
+        for user_id in user_ids:
+            self._local.pop(user_id)
+        self.redis_service.delete(*[self._key(user_id) for user_id in user_ids])
+        self.redis_service.bump_authz_versions(user_ids)
+
+
+def _history_values(obj, attr):
+    """
+    Current and previous (not yet flushed away) values of the attribute.
+    """
+    history = inspect(obj).attrs[attr].history
+    return list(itertools.chain(history.added, history.unchanged, history.deleted))
+
+
+def _affected_user_ids(session):
+    from elar.models import User, ClientAccountUser, Contract
+
+    user_ids = set()
+    client_account_ids = set()
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, User):
+            user_ids.add(obj.id)
+        elif isinstance(obj, ClientAccountUser):
+            user_ids.update(_history_values(obj, 'user_id'))
+        elif isinstance(obj, Contract):
+            client_account_ids.update(_history_values(obj, 'client_account_id'))
+            client_account_ids.update(_history_values(obj, 'accounting_client_account_id'))
+    client_account_ids.discard(None)
+    if client_account_ids:
+        # contract changes affect every member of both contracted companies
+        rows = session.execute(
+            select([ClientAccountUser.user_id])
+            .where(ClientAccountUser.client_account_id.in_(client_account_ids))
+        )
+        user_ids.update(row[0] for row in rows)
+    user_ids.discard(None)
+    return user_ids
+
+
+def _collect_after_flush(session, flush_context):
+    user_ids = _affected_user_ids(session)
+    if user_ids:
+        session.info.setdefault(_PENDING_KEY, set()).update(user_ids)
+
+
+def _invalidate_after_commit(session):
+    user_ids = session.info.pop(_PENDING_KEY, None)
+    if user_ids and has_app_context() and hasattr(current_app, 'auth_context_cache'):
+        current_app.auth_context_cache.invalidate(user_ids)
+
+
+def register_invalidation_listeners():
+    """
+    Drop cached contexts once ORM changes of users, memberships or contracts
+    are committed. Bulk query.update()/query.delete() calls and plain SQL
+    bypass ORM events: cached contexts then live until the cache TTL and
+    scopes embedded in access tokens until they expire
+    (SCOPED_ACCESS_TOKEN_SCOPES_TTL), unless the change calls
+    AuthContextCache.invalidate() itself.
+    """
+    if not event.contains(Session, 'after_flush', _collect_after_flush):
+        event.listen(Session, 'after_flush', _collect_after_flush)
+        event.listen(Session, 'after_commit', _invalidate_after_commit)
@@ -1,38 +1,159 @@
 # -*- coding: utf-8 -*-
 from flask import current_app
 from redis import StrictRedis
+from elar.utils.bloom_filter import BloomFilter
+import hashlib
 import json
+import time
+import uuid
+
+DENYLIST_MODE_PLAIN = 'plain'
+DENYLIST_MODE_BLOOM = 'bloom'
 
 
 class RedisService():
     """
     An helper class to communicate with Redis cache.
+
+    In 'bloom' denylist mode denied tokens are stored by their sha256 hash and
+    every process keeps a Bloom filter of them, rebuilt each
+    `denylist_refresh_interval` seconds. Tokens missing in the filter are
+    answered locally, Redis is asked only on possible positives. A token denied
+    by another process is noticed after the next refresh.
     """
 
-    def __init__(self, redis_uri):
+    DENIED_TOKENS_KEY = 'denied_tokens'
+    DENIED_FILTER_CAPACITY = 10000
+
+    def __init__(self, redis_uri, denylist_mode=DENYLIST_MODE_PLAIN, denylist_refresh_interval=10):
         self.redis_uri = redis_uri
         self.redis = StrictRedis.from_url(self.redis_uri)
+        self.denylist_mode = denylist_mode
+        self.denylist_refresh_interval = denylist_refresh_interval
+        self.denied_filter = None
+        self.denied_filter_refreshed_at = 0
+
+    @staticmethod
+    def token_hash(token):
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
 
     def deny_token(self, token):
         """
         mark token as expired.
         notes: ttl must be greater or equal token expired time.
         """
-        self.redis.setex(token, current_app.config['TOKEN_EXPIRE_TIME'], json.dumps({
-            'expired': True
-        }))
+        ttl = current_app.config['TOKEN_EXPIRE_TIME']
+        if self.denylist_mode != DENYLIST_MODE_BLOOM:
+            self.redis.setex(token, ttl, json.dumps({
+                'expired': True
+            }))
+            return
+
+        token_hash = self.token_hash(token)
+        pipe = self.redis.pipeline()
+        pipe.setex(f'denied_token:{token_hash}', ttl, 1)
+        pipe.zadd(self.DENIED_TOKENS_KEY, {token_hash: time.time() + ttl})
+        pipe.execute()
+        self.get_denied_filter().add(token_hash)
 
     def is_token_denied(self, token):
         """
         check if token is marked as denied.
         """
-        data = self.redis.get(token)
-        if data:
-            return json.loads(data).get('expired') is True
-        return False
+        if self.denylist_mode != DENYLIST_MODE_BLOOM:
+            data = self.redis.get(token)
+            if data:
+                return json.loads(data).get('expired') is True
+            return False
+
+        token_hash = self.token_hash(token)
+        if token_hash not in self.get_denied_filter():
+            return False
+        return self.redis.exists(f'denied_token:{token_hash}') > 0
+
+    def get_denied_filter(self):
+        if (
+            self.denied_filter is None
+            or time.monotonic() - self.denied_filter_refreshed_at > self.denylist_refresh_interval
+        ):
+            self.refresh_denied_filter()
+        return self.denied_filter
+
+    def refresh_denied_filter(self):
+        """
+        rebuild local Bloom filter from hashes of not yet expired denied tokens.
+        """
+        now = time.time()
+        pipe = self.redis.pipeline()
+        pipe.zremrangebyscore(self.DENIED_TOKENS_KEY, '-inf', now)
+        pipe.zrangebyscore(self.DENIED_TOKENS_KEY, now, '+inf')
+        _, token_hashes = pipe.execute()
+
+        denied_filter = BloomFilter(capacity=max(self.DENIED_FILTER_CAPACITY, 2 * len(token_hashes)))
+        for token_hash in token_hashes:
+            denied_filter.add(token_hash.decode('utf-8'))
+        self.denied_filter = denied_filter
+        self.denied_filter_refreshed_at = time.monotonic()
+
+    def get_authz_version(self, user_id):
+        """
+        current authorization version of the user.
+        it changes every time access rights of the user change.
+        """
+        return int(self.redis.get(f'authz_version:{user_id}') or 0)
+
+    def bump_authz_versions(self, user_ids):
+        """
+        mark scopes embedded in already issued tokens of these users as stale.
+        """
+        pipe = self.redis.pipeline()
+        for user_id in user_ids:
+            pipe.incr(f'authz_version:{user_id}')
+        pipe.execute()
 
     def get(self, name):
         return self.redis.get(name)
 
     def setex(self, name, time, value):
         return self.redis.setex(name, time, value)
+
+    def delete(self, *names):
+        return self.redis.delete(*names)
+
+    def sismember(self, name, value):
+        return self.redis.sismember(name, value)
+
+    def sadd(self, name, *values):
+        return self.redis.sadd(name, *values)
+
+    def replace_set(self, name, batches):
+        """
+        Replace set `name` with members given in batches. Members added to
+        `name` meanwhile (by other processes) are kept, the swap itself is a
+        single MULTI. Concurrent rebuilds use their own temporary keys.
+        """
+        token = uuid.uuid4().hex
+        staging, snapshot, added = (f'{name}:{part}:{token}' for part in ('staging', 'snapshot', 'added'))
+        try:
+            self.redis.sunionstore(snapshot, name)
+            for batch in batches:
+                if batch:
+                    self.redis.sadd(staging, *batch)
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.sdiffstore(added, name, snapshot)
+            pipe.sunionstore(name, staging, added)
+            pipe.execute()
+        finally:
+            self.redis.delete(staging, snapshot, added)
+
+    def incr_hash(self, name, increments):
+        """
+        Add `increments` ({field: amount}) to hash `name` in one round trip.
+        """
+        pipe = self.redis.pipeline(transaction=False)
+        for field, amount in increments.items():
+            pipe.hincrbyfloat(name, field, amount)
+        pipe.execute()
+
+    def get_hash(self, name):
+        return {field.decode('utf-8'): float(value) for field, value in self.redis.hgetall(name).items()}
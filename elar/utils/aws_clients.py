@@ -0,0 +1,55 @@
+import os
+import threading
+
+import boto3
+from botocore.client import Config
+
+# shared by all clients: pool big enough for threaded workers, standard retry mode
+CLIENT_CONFIG = Config(
+    max_pool_connections=50,
+    connect_timeout=5,
+    read_timeout=30,
+    retries={'max_attempts': 5, 'mode': 'standard'},
+)
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def _reset_clients():
+    # connection pools must not be shared with forked (celery, uwsgi) children
+    _clients.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_clients)
+
+
+def get_client(service_name, signature_version=None, **client_kwargs):
+    """
+    Process wide boto3 client per (service, region, credentials, signature version).
+
+    boto3 clients are thread safe once built, but building one resolves
+    credentials, loads endpoint data and opens a new connection pool, and
+    boto3.client() on the default session is not thread safe itself.
+    """
+    key = (service_name, signature_version, tuple(sorted(client_kwargs.items())))
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                config = CLIENT_CONFIG
+                if signature_version:
+                    config = config.merge(Config(signature_version=signature_version))
+                client = boto3.session.Session().client(service_name, config=config, **client_kwargs)
+                _clients[key] = client
+    return client
+
+
+def inbound_bucket_credentials():
+    return {
+        'aws_access_key_id': os.getenv('AWS_EMAIL_INBOUND_BUCKET_ACCESS_KEY_ID'),
+        'aws_secret_access_key': os.getenv('AWS_EMAIL_INBOUND_BUCKET_SECRET_ACCESS_KEY'),
+        'region_name': os.getenv('AWS_EMAIL_INBOUND_BUCKET_DEFAULT_REGION'),
+    }
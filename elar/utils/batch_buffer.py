@@ -0,0 +1,85 @@
+import atexit
+import os
+import threading
+import time
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+class BatchBuffer():
+    """
+    Rows collected in memory by the process and handed to `writer` in bulk.
+    Flushed when `max_size` rows are pending, `max_age` seconds after the
+    first pending row and whenever flush() is called (at shutdown). Rows of
+    a failed write are kept for the next flush, up to `max_pending` rows.
+    The writer runs in the app context once init_app() was called, which
+    also makes the buffer flush at interpreter exit.
+    """
+
+    def __init__(self, writer, max_size=100, max_age=5, max_pending=10000):
+        self.writer = writer
+        self.max_size = max_size
+        self.max_age = max_age
+        self.max_pending = max_pending
+        self.app = None
+        self._rows = []
+        self._timer = None
+        self._lock = threading.Lock()
+        self._exit_registered = False
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def init_app(self, app, max_size=None, max_age=None):
+        self.app = app
+        if max_size is not None:
+            self.max_size = max_size
+        if max_age is not None:
+            self.max_age = max_age
+        if not self._exit_registered:
+            atexit.register(self.flush)
+            self._exit_registered = True
+
+    def _reset(self):
+        # pending rows belong to the parent, which flushes them itself
+        self._rows = []
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def add(self, *row):
+        with self._lock:
+            self._rows.append(row)
+            if len(self._rows) < self.max_size:
+                if self._timer is None and self.max_age:
+                    self._timer = threading.Timer(self.max_age, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+        self.flush()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def flush(self):
+        with self._lock:
+            rows, self._rows = self._rows, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not rows:
+            return 0
+        started = time.monotonic()
+        try:
+            if self.app is not None:
+                with self.app.app_context():
+                    self.writer(rows)
+            else:
+                self.writer(rows)
+        except Exception:
+            with self._lock:
+                self._rows = (rows + self._rows)[-self.max_pending:]
+            logger.exception(f'Batch buffer. Writing {len(rows)} rows failed')
+            return 0
+        logger.debug(f'Batch buffer. {len(rows)} rows written in {time.monotonic() - started:.3f}s')
+        return len(rows)
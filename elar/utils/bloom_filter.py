@@ -0,0 +1,29 @@
+import hashlib
+import math
+
+
+class BloomFilter():
+    """
+    Fixed size Bloom filter over strings.
+    Never gives false negatives, false positives happen with ~error_rate
+    probability while the filter holds no more than `capacity` items.
+    """
+
+    def __init__(self, capacity=10000, error_rate=0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        # double hashing: k positions out of two 64 bit halves of one digest
+        digest = hashlib.sha256(item.encode('utf-8')).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:16], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] >> (position & 7) & 1 for position in self._positions(item))
@@ -2,89 +2,138 @@ import os
 import logging
 import boto3
 from botocore.exceptions import ClientError
-from botocore.client import Config
 from flask import current_app as app
 import hashlib
-import io
-from elar import s3_client
+import uuid
+from elar.utils.aws_clients import get_client, inbound_bucket_credentials
+from elar.utils.ttl_cache import TTLCache
+from elar.utils.upload_index import mark_uploaded, object_exists
 # from lxml import etree
 import requests
 import urllib
-import ast
+import json
 
 logger = logging.getLogger(__name__)
 
+# presigned urls are handed out only during this part of their lifetime
+PRESIGNED_URL_REUSE_FRACTION = 0.5
+presigned_urls = TTLCache(maxsize=10000)
 
-def store_file_to_s3_bucket(file_body, file_name, content_type, sub_folder=None):
-    file_object = io.BytesIO(file_body)
+# S3 requires parts of at least 5 MiB, except the last one
+MULTIPART_PART_SIZE = 8 * 1024 * 1024
+
+
+def content_addressed_key(hash_val, file_name, sub_folder=None):
+    filename, file_extension = os.path.splitext(file_name)
+    if sub_folder is None:
+        return "{}{}".format(hash_val, file_extension)
+    return "{}/{}{}".format(sub_folder, hash_val, file_extension)
 
-    s3 = boto3.client("s3", **app.config["AWS"])
+
+def store_file_to_s3_bucket(file_body, file_name, content_type, sub_folder=None):
+    s3 = get_client("s3", **app.config["AWS"])
     region_name = app.config["AWS"]["region_name"]
     bucket_name = app.config["UPLOAD_DOC_S3_BUCKET"]
 
-    hasher = hashlib.sha256()
-    while chunk := file_object.read(8192):
-        hasher.update(chunk)
-    hash_val = hasher.hexdigest()
+    obj_key = content_addressed_key(hashlib.sha256(file_body).hexdigest(), file_name, sub_folder)
+
+    # identical content is stored under the same key already
+    if not object_exists(s3, bucket_name, obj_key):
+        s3.put_object(
+            Body=file_body,
+            Bucket=bucket_name,
+            Key=obj_key,
+            # ServerSideEncryption='aws:kms',
+            ContentType=content_type,
+        )
+        mark_uploaded(bucket_name, obj_key)
+    object_url = f"https://{bucket_name}.s3.{region_name}.amazonaws.com/{obj_key}"
+    return obj_key, object_url
 
-    file_object.seek(0)
 
-    filename, file_extension = os.path.splitext(file_name)
-    if sub_folder is None:
-        obj_key = "{}{}".format(hash_val, file_extension)
-    else:
-        obj_key = "{}/{}{}".format(sub_folder, hash_val, file_extension)
-
-    s3.put_object(
-        Body=file_object.read(),
-        Bucket=bucket_name,
-        Key=obj_key,
-        # ServerSideEncryption='aws:kms',
-        ContentType=content_type,
-    )
+def read_part(stream, size):
+    # streams may return short reads, all parts but the last must be full
+    part = stream.read(size)
+    while part and len(part) < size:
+        more = stream.read(size - len(part))
+        if not more:
+            break
+        part += more
+    return part
+
+
+def store_stream_to_s3_bucket(stream, file_name, content_type, sub_folder=None, part_size=MULTIPART_PART_SIZE):
+    """
+    Upload file-like object under its content addressed key holding
+    at most two parts in memory.
+    Files fitting into one part are hashed first and put directly. Bigger
+    ones are hashed while uploaded in parts to a temporary key, which is then
+    copied to the final key and removed.
+    Content already in the bucket is not put (or copied) again.
+    """
+    s3 = get_client("s3", **app.config["AWS"])
+    region_name = app.config["AWS"]["region_name"]
+    bucket_name = app.config["UPLOAD_DOC_S3_BUCKET"]
+
+    hasher = hashlib.sha256()
+    chunk = read_part(stream, part_size)
+    hasher.update(chunk)
+    next_chunk = read_part(stream, part_size)
+
+    if not next_chunk:
+        obj_key = content_addressed_key(hasher.hexdigest(), file_name, sub_folder)
+        if not object_exists(s3, bucket_name, obj_key):
+            s3.put_object(Body=chunk, Bucket=bucket_name, Key=obj_key, ContentType=content_type)
+            mark_uploaded(bucket_name, obj_key)
+        object_url = f"https://{bucket_name}.s3.{region_name}.amazonaws.com/{obj_key}"
+        return obj_key, object_url
+
+    tmp_key = content_addressed_key(f"tmp/{uuid.uuid4()}", file_name)
+    upload_id = s3.create_multipart_upload(Bucket=bucket_name, Key=tmp_key, ContentType=content_type)["UploadId"]
+    parts = []
+    try:
+        while chunk:
+            response = s3.upload_part(
+                Body=chunk, Bucket=bucket_name, Key=tmp_key, UploadId=upload_id, PartNumber=len(parts) + 1
+            )
+            parts.append({"ETag": response["ETag"], "PartNumber": len(parts) + 1})
+            chunk, next_chunk = next_chunk, read_part(stream, part_size)
+            hasher.update(chunk)
+        s3.complete_multipart_upload(
+            Bucket=bucket_name, Key=tmp_key, UploadId=upload_id, MultipartUpload={"Parts": parts}
+        )
+    except Exception:
+        s3.abort_multipart_upload(Bucket=bucket_name, Key=tmp_key, UploadId=upload_id)
+        raise
+
+    obj_key = content_addressed_key(hasher.hexdigest(), file_name, sub_folder)
+    try:
+        if not object_exists(s3, bucket_name, obj_key):
+            # managed copy, switches to multipart copy above 5 GB
+            s3.copy(
+                {"Bucket": bucket_name, "Key": tmp_key},
+                bucket_name,
+                obj_key,
+                ExtraArgs={"ContentType": content_type, "MetadataDirective": "REPLACE"},
+            )
+            mark_uploaded(bucket_name, obj_key)
+    finally:
+        s3.delete_object(Bucket=bucket_name, Key=tmp_key)
     object_url = f"https://{bucket_name}.s3.{region_name}.amazonaws.com/{obj_key}"
     return obj_key, object_url
 
 
 def configure_s3_client():
-    AWS_EMAIL_INBOUND_BUCKET_ACCESS_KEY_ID = os.getenv('AWS_EMAIL_INBOUND_BUCKET_ACCESS_KEY_ID')
-    AWS_EMAIL_INBOUND_BUCKET_SECRET_ACCESS_KEY = os.getenv('AWS_EMAIL_INBOUND_BUCKET_SECRET_ACCESS_KEY')
-    AWS_EMAIL_INBOUND_BUCKET_DEFAULT_REGION = os.getenv('AWS_EMAIL_INBOUND_BUCKET_DEFAULT_REGION')
-    AWS_EMAIL_INBOUND_BUCKET = {
-        'aws_access_key_id': AWS_EMAIL_INBOUND_BUCKET_ACCESS_KEY_ID,
-        'aws_secret_access_key': AWS_EMAIL_INBOUND_BUCKET_SECRET_ACCESS_KEY,
-        'region_name': AWS_EMAIL_INBOUND_BUCKET_DEFAULT_REGION
-    }
-    s3 = boto3.client('s3', **AWS_EMAIL_INBOUND_BUCKET)
-    return s3
+    return get_client('s3', **inbound_bucket_credentials())
 
 
 def configure_s3_client_signature_version_4():
-    AWS_EMAIL_INBOUND_BUCKET_ACCESS_KEY_ID = os.getenv('AWS_EMAIL_INBOUND_BUCKET_ACCESS_KEY_ID')
-    AWS_EMAIL_INBOUND_BUCKET_SECRET_ACCESS_KEY = os.getenv('AWS_EMAIL_INBOUND_BUCKET_SECRET_ACCESS_KEY')
-    AWS_EMAIL_INBOUND_BUCKET_DEFAULT_REGION = os.getenv('AWS_EMAIL_INBOUND_BUCKET_DEFAULT_REGION')
-    AWS_EMAIL_INBOUND_BUCKET = {
-        'aws_access_key_id': AWS_EMAIL_INBOUND_BUCKET_ACCESS_KEY_ID,
-        'aws_secret_access_key': AWS_EMAIL_INBOUND_BUCKET_SECRET_ACCESS_KEY,
-        'region_name': AWS_EMAIL_INBOUND_BUCKET_DEFAULT_REGION
-    }
-    config = Config(
-        signature_version='s3v4',
-    )
-    s3 = boto3.client('s3', **AWS_EMAIL_INBOUND_BUCKET, config=config)
-    return s3
+    return get_client('s3', signature_version='s3v4', **inbound_bucket_credentials())
 
 
 def configure_s3_resource():
-    AWS_EMAIL_INBOUND_BUCKET_ACCESS_KEY_ID = os.getenv('AWS_EMAIL_INBOUND_BUCKET_ACCESS_KEY_ID')
-    AWS_EMAIL_INBOUND_BUCKET_SECRET_ACCESS_KEY = os.getenv('AWS_EMAIL_INBOUND_BUCKET_SECRET_ACCESS_KEY')
-    AWS_EMAIL_INBOUND_BUCKET_DEFAULT_REGION = os.getenv('AWS_EMAIL_INBOUND_BUCKET_DEFAULT_REGION')
-    AWS_EMAIL_INBOUND_BUCKET = {
-        'aws_access_key_id': AWS_EMAIL_INBOUND_BUCKET_ACCESS_KEY_ID,
-        'aws_secret_access_key': AWS_EMAIL_INBOUND_BUCKET_SECRET_ACCESS_KEY,
-        'region_name': AWS_EMAIL_INBOUND_BUCKET_DEFAULT_REGION
-    }
-    s3 = boto3.resource('s3', **AWS_EMAIL_INBOUND_BUCKET)
+    # resources are not thread safe, so they are not shared
+    s3 = boto3.resource('s3', **inbound_bucket_credentials())
     return s3
 
 
@@ -98,9 +147,9 @@ def create_presigned_url(bucket_name, object_name, expiration=3600, SSECustomerA
         if SSECustomerAlgorithm:
             params['SSECustomerAlgorithm'] = SSECustomerAlgorithm
 
-        response = s3_client.generate_presigned_url('get_object',
-                                                    Params=params,
-                                                    ExpiresIn=expiration)
+        response = configure_s3_client().generate_presigned_url('get_object',
+                                                                Params=params,
+                                                                ExpiresIn=expiration)
     except ClientError as e:
         logging.error(e)
         return None
@@ -108,6 +157,40 @@ def create_presigned_url(bucket_name, object_name, expiration=3600, SSECustomerA
     return response
 
 
+def create_presigned_urls(bucket_name, object_names, expiration=3600):
+    """
+    Presigned urls of many objects of one bucket as {object_name: url}.
+    Every url is signed once per process and reused while it has more than
+    (1 - PRESIGNED_URL_REUSE_FRACTION) of its expiration left. The urls
+    missing in the cache are all signed with one client, signing is local.
+    """
+    urls = {}
+    missing = []
+    for object_name in set(object_names):
+        urls[object_name] = presigned_urls.get((bucket_name, object_name, expiration))
+        if urls[object_name] is None:
+            missing.append(object_name)
+    if not missing:
+        return urls
+
+    s3_client = configure_s3_client()
+    for object_name in missing:
+        try:
+            url = s3_client.generate_presigned_url('get_object',
+                                                   Params={'Bucket': bucket_name, 'Key': object_name},
+                                                   ExpiresIn=expiration)
+        except ClientError as e:
+            logging.error(e)
+            continue
+        presigned_urls.set((bucket_name, object_name, expiration), url, ttl=expiration * PRESIGNED_URL_REUSE_FRACTION)
+        urls[object_name] = url
+    return urls
+
+
+def get_presigned_url(bucket_name, object_name, expiration=3600):
+    return create_presigned_urls(bucket_name, [object_name], expiration=expiration)[object_name]
+
+
 def create_presigned_url_signature_version_4(bucket_name, object_name, expiration=3600, SSECustomerAlgorithm=None):
     """
     Taken from:
@@ -134,9 +217,7 @@ def create_presigned_url_signature_version_4(bucket_name, object_name, expiratio
 # ## SQS handling using AWS library
 # ###################################################################
 def sqs_receive_message_2():
-    sqs = boto3.client('sqs', **app.config['AWS_SQS'])
-
-    response = sqs.list_queues()
+    sqs = get_client('sqs', **app.config['AWS_SQS'])
     queue_url = app.config['AWS_SQS_QUEUE_URL']
 
     response = sqs.receive_message(
@@ -155,7 +236,7 @@ def sqs_receive_message_2():
 
 
 def sqs_delete_message_2(receipt_handle):
-    sqs = boto3.client('sqs', **app.config['AWS_SQS'])
+    sqs = get_client('sqs', **app.config['AWS_SQS'])
     queue_url = app.config['AWS_SQS_QUEUE_URL']
     response = sqs.delete_message(
         QueueUrl=queue_url,
@@ -171,7 +252,7 @@ def sqs_parse_received_message_2(responce):
 
     receipt_handle = message['ReceiptHandle']
     body = message['Body']
-    body_jsoned = ast.literal_eval(body)
+    body_jsoned = json.loads(body)
     bucket_name = body_jsoned['Records'][0]['s3']['bucket']['name']
     file_key = body_jsoned['Records'][0]['s3']['object']['key']
     return receipt_handle, bucket_name, file_key
@@ -0,0 +1,91 @@
+"""
+Celery task metrics as flat counters, so that observations of every worker
+process can be summed in one Redis hash and rendered in the Prometheus text
+format. Fields are `metric|task|label`: the `le` bound for histogram buckets,
+the outcome for outcome counters, empty otherwise.
+"""
+import math
+from collections import Counter
+
+METRICS_KEY = 'task_metrics'
+
+OUTCOME_SUCCESS = 'success'
+OUTCOME_RETRY = 'retry'
+OUTCOME_FAILURE = 'failure'
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, math.inf)
+
+HISTOGRAMS = {
+    'celery_task_queue_wait_seconds': 'Time from publishing (or eta) to start of the task.',
+    'celery_task_run_seconds': 'Run time of the task.',
+}
+COUNTERS = {
+    'celery_task_outcomes_total': 'Finished task executions by outcome.',
+    'celery_task_retries_total': 'Task executions ending with a retry.',
+}
+
+
+def bucket_label(bound):
+    return '+Inf' if bound == math.inf else repr(float(bound))
+
+
+def observe_histogram(fields, metric, task_name, value):
+    for bound in BUCKETS:
+        if value <= bound:
+            fields[f'{metric}_bucket|{task_name}|{bucket_label(bound)}'] += 1
+    fields[f'{metric}_sum|{task_name}|'] += value
+    fields[f'{metric}_count|{task_name}|'] += 1
+
+
+def metric_fields(observations):
+    """
+    Sum (task_name, queue_wait, run_time, outcome) observations into field
+    increments. Queue wait is None when the publish time is unknown.
+    """
+    fields = Counter()
+    for task_name, queue_wait, run_time, outcome in observations:
+        if queue_wait is not None:
+            observe_histogram(fields, 'celery_task_queue_wait_seconds', task_name, max(queue_wait, 0))
+        observe_histogram(fields, 'celery_task_run_seconds', task_name, run_time)
+        fields[f'celery_task_outcomes_total|{task_name}|{outcome}'] += 1
+        if outcome == OUTCOME_RETRY:
+            fields[f'celery_task_retries_total|{task_name}|'] += 1
+    return fields
+
+
+def _number(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render_metrics(fields):
+    """
+    Prometheus text exposition of summed fields. Histograms list every
+    bucket, including the empty ones which are never stored.
+    """
+    samples = {}
+    for field, value in fields.items():
+        name, task_name, label = field.split('|', 2)
+        samples.setdefault(name, {}).setdefault(task_name, {})[label] = value
+
+    lines = []
+    for metric, description in HISTOGRAMS.items():
+        counts = samples.get(f'{metric}_count', {})
+        if not counts:
+            continue
+        lines += [f'# HELP {metric} {description}', f'# TYPE {metric} histogram']
+        for task_name in sorted(counts):
+            buckets = samples.get(f'{metric}_bucket', {}).get(task_name, {})
+            for bound in BUCKETS:
+                label = bucket_label(bound)
+                lines.append(f'{metric}_bucket{{task="{task_name}",le="{label}"}} {_number(buckets.get(label, 0))}')
+            lines.append(f'{metric}_sum{{task="{task_name}"}} {_number(samples[f"{metric}_sum"][task_name][""])}')
+            lines.append(f'{metric}_count{{task="{task_name}"}} {_number(counts[task_name][""])}')
+    for metric, description in COUNTERS.items():
+        if metric not in samples:
+            continue
+        lines += [f'# HELP {metric} {description}', f'# TYPE {metric} counter']
+        for task_name, values in sorted(samples[metric].items()):
+            for label, value in sorted(values.items()):
+                labels = f'task="{task_name}",outcome="{label}"' if label else f'task="{task_name}"'
+                lines.append(f'{metric}{{{labels}}} {_number(value)}')
+    return '\n'.join(lines) + '\n'
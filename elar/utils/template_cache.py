@@ -0,0 +1,66 @@
+import os
+import stat
+import logging
+
+from jinja2 import FileSystemBytecodeCache, MemcachedBytecodeCache
+
+logger = logging.getLogger(__name__)
+
+BYTECODE_CACHE_FILESYSTEM = 'filesystem'
+BYTECODE_CACHE_REDIS = 'redis'
+
+
+def is_private_directory(directory):
+    """
+    Create the directory readable by the process user only and check that it
+    is owned by it: cached bytecode is loaded with marshal, so whoever can
+    write there runs code in uwsgi and celery processes.
+    """
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    info = os.lstat(directory)
+    return (
+        stat.S_ISDIR(info.st_mode)
+        and info.st_uid == os.getuid()
+        and not info.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+    )
+
+
+def make_bytecode_cache(config, redis_service=None):
+    """
+    Bytecode cache for mail templates selected by MAIL_TEMPLATE_BYTECODE_CACHE:
+    'filesystem' (default, shared by processes of one host, MAIL_TEMPLATE_CACHE_DIR
+    or the per user directory of Jinja), 'redis' (shared
+    by all hosts) or None. Entries are keyed by template source checksum,
+    so edited templates are recompiled.
+    """
+    kind = config.get('MAIL_TEMPLATE_BYTECODE_CACHE', BYTECODE_CACHE_FILESYSTEM)
+    if kind == BYTECODE_CACHE_FILESYSTEM:
+        directory = config.get('MAIL_TEMPLATE_CACHE_DIR')
+        if directory and is_private_directory(directory):
+            return FileSystemBytecodeCache(directory)
+        if directory:
+            logger.error(f'Mail template cache directory {directory} is not private, using the default one')
+        # per user directory with mode 0700 and checked owner
+        return FileSystemBytecodeCache()
+    if kind == BYTECODE_CACHE_REDIS and redis_service is not None:
+        # redis-py set(name, value, ex) matches the memcached client interface
+        return MemcachedBytecodeCache(
+            redis_service.redis,
+            prefix='jinja2/bytecode/',
+            timeout=config.get('MAIL_TEMPLATE_CACHE_TIMEOUT', 7 * 24 * 3600),
+        )
+    return None
+
+
+def warm_up_templates(env):
+    """
+    Compile all templates of the environment, filling its in-memory cache
+    (inherited by forked uwsgi and celery workers) and the bytecode cache.
+    """
+    names = env.list_templates()
+    for name in names:
+        try:
+            env.get_template(name)
+        except Exception as e:
+            logger.error(f'Template {name} failed to compile: {e}')
+    return names
@@ -0,0 +1,57 @@
+import posixpath
+
+from botocore.exceptions import ClientError
+from flask import current_app as app
+
+UPLOAD_INDEX_PREFIX = 'uploaded_objects:'
+
+
+def upload_index_key(bucket_name, sub_folder=None):
+    return f'{UPLOAD_INDEX_PREFIX}{bucket_name}/{sub_folder or ""}'
+
+
+def _index_key_of(bucket_name, obj_key):
+    return upload_index_key(bucket_name, posixpath.dirname(obj_key))
+
+
+def mark_uploaded(bucket_name, obj_key):
+    app.redis.sadd(_index_key_of(bucket_name, obj_key), obj_key)
+
+
+def object_exists(s3, bucket_name, obj_key):
+    """
+    Whether the object is already in the bucket. Asks the dedup index
+    (Redis set per bucket and sub folder) first and falls back to a HEAD
+    request, remembering objects found that way.
+    """
+    if app.redis.sismember(_index_key_of(bucket_name, obj_key), obj_key):
+        return True
+    try:
+        s3.head_object(Bucket=bucket_name, Key=obj_key)
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+            return False
+        raise
+    mark_uploaded(bucket_name, obj_key)
+    return True
+
+
+def rebuild_upload_index(s3, bucket_name, sub_folder=None):
+    """
+    Rebuild the dedup index of one sub folder from the bucket listing,
+    dropping keys of objects removed from the bucket meanwhile.
+    Returns the number of indexed objects.
+    """
+    indexed = 0
+
+    def batches():
+        nonlocal indexed
+        paginator = s3.get_paginator('list_objects_v2')
+        prefix = f'{sub_folder}/' if sub_folder else ''
+        for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix, Delimiter='/'):
+            keys = [item['Key'] for item in page.get('Contents', [])]
+            indexed += len(keys)
+            yield keys
+
+    app.redis.replace_set(upload_index_key(bucket_name, sub_folder), batches())
+    return indexed
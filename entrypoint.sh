@@ -6,10 +6,12 @@ main() {
 #      exec uwsgi --ini ${APP_HOME}/uwsgi.ini -H $(pipenv --venv)
 #      .venv/bin/python -m flask run
       /app/.venv/bin/python -m flask db upgrade
+      /app/.venv/bin/python -m flask compile-mail-templates
       exec /app/.venv/bin/python -m flask run
     elif [ "${ROLE}" = 'worker' ] ; then
 #      exec pipenv run celery -A run_celery:celery worker --without-gossip --without-mingle --without-heartbeat --beat -l ${LOGGING_LEVEL} -c ${WORKER_PROCESSES}
-      exec pipenv run celery -A run_celery:celery worker -E --loglevel=INFO
+      # one pool for all lanes unless WORKER_QUEUES names a dedicated one (mail, bulk, periodic)
+      exec pipenv run celery -A run_celery:celery worker -E -Q ${WORKER_QUEUES:-mail,bulk,periodic} --loglevel=INFO
     elif [ "${ROLE}" = 'beat' ] ; then
       exec pipenv run celery -A run_celery:celery beat --loglevel=DEBUG
     else
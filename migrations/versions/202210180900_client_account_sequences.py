@@ -0,0 +1,51 @@
+"""client account sequences
+
+Revision ID: 202210180900
+Revises: 202207212045
+Create Date: 2022-10-18 09:00:12.418530
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '202210180900'
+down_revision = '202207212045'
+branch_labels = None
+depends_on = None
+
+LEGACY_COLUMNS = {
+    'general': 'sequence_number',
+    'recon': 'recon_seq_num',
+    'sale_invoice': 'sale_invoice_seq_number',
+    'purchase_invoice': 'purchase_invoice_seq_number',
+    'sale_credit_note': 'sale_credit_notes_seq_number',
+    'purchase_credit_note': 'purchase_credit_notes_seq_number',
+    'receipt': 'receipt_seq_number',
+    'payment': 'payment_seq_number',
+}
+
+
+def upgrade():
+    op.create_table('sb_client_account_sequences',
+    sa.Column('client_account_id', sa.BigInteger(), nullable=False),
+    sa.Column('kind', sa.String(length=32), nullable=False),
+    sa.Column('last_value', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['client_account_id'], ['sb_client_accounts.id'], name=op.f('fk_sb_client_account_sequences_client_account_id_sb_client_accounts'), ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('client_account_id', 'kind', name=op.f('pk_sb_client_account_sequences'))
+    )
+    for kind, column in LEGACY_COLUMNS.items():
+        op.execute(
+            f"INSERT INTO sb_client_account_sequences (client_account_id, kind, last_value) "
+            f"SELECT id, '{kind}', {column} FROM sb_client_accounts WHERE {column} IS NOT NULL"
+        )
+
+
+def downgrade():
+    for kind, column in LEGACY_COLUMNS.items():
+        op.execute(
+            f"UPDATE sb_client_accounts SET {column} = s.last_value FROM sb_client_account_sequences s "
+            f"WHERE s.client_account_id = sb_client_accounts.id AND s.kind = '{kind}'"
+        )
+    op.drop_table('sb_client_account_sequences')
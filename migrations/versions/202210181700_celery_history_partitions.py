@@ -0,0 +1,75 @@
+"""celery history partitions
+
+Revision ID: 202210181700
+Revises: 202210181500
+Create Date: 2022-10-18 17:00:12.384150
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '202210181700'
+down_revision = '202210181500'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute('ALTER TABLE sb_celery_history RENAME TO sb_celery_history_legacy')
+    op.execute('ALTER TABLE sb_celery_history_legacy RENAME CONSTRAINT pk_sb_celery_history TO pk_sb_celery_history_legacy')
+    op.execute('ALTER SEQUENCE sb_celery_history_id_seq RENAME TO sb_celery_history_legacy_id_seq')
+    op.execute("""
+        CREATE TABLE sb_celery_history (
+            id BIGSERIAL NOT NULL,
+            task_name VARCHAR(40) NOT NULL,
+            task_timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            CONSTRAINT pk_sb_celery_history PRIMARY KEY (id, task_timestamp)
+        ) PARTITION BY RANGE (task_timestamp)
+    """)
+    op.execute('CREATE TABLE sb_celery_history_default PARTITION OF sb_celery_history DEFAULT')
+    # one partition per month holding history, plus the next two months
+    op.execute("""
+        DO $$
+        DECLARE
+            month timestamp;
+        BEGIN
+            FOR month IN SELECT generate_series(
+                date_trunc('month', COALESCE((SELECT min(task_timestamp) FROM sb_celery_history_legacy), now())),
+                date_trunc('month', now()) + interval '2 months',
+                interval '1 month'
+            ) LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF sb_celery_history FOR VALUES FROM (%L) TO (%L)',
+                    'sb_celery_history_y' || to_char(month, 'YYYY') || 'm' || to_char(month, 'MM'),
+                    month, month + interval '1 month'
+                );
+            END LOOP;
+        END
+        $$
+    """)
+    op.execute("""
+        INSERT INTO sb_celery_history (id, task_name, task_timestamp)
+        SELECT id, task_name, task_timestamp FROM sb_celery_history_legacy
+    """)
+    op.execute("SELECT setval(pg_get_serial_sequence('sb_celery_history', 'id'), COALESCE((SELECT max(id) FROM sb_celery_history), 0) + 1, false)")
+    op.drop_table('sb_celery_history_legacy')
+
+
+def downgrade():
+    op.execute('ALTER TABLE sb_celery_history RENAME TO sb_celery_history_partitioned')
+    op.execute('ALTER TABLE sb_celery_history_partitioned RENAME CONSTRAINT pk_sb_celery_history TO pk_sb_celery_history_partitioned')
+    op.execute('ALTER SEQUENCE sb_celery_history_id_seq RENAME TO sb_celery_history_partitioned_id_seq')
+    op.create_table('sb_celery_history',
+    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('task_name', sa.String(length=40), nullable=False),
+    sa.Column('task_timestamp', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_sb_celery_history'))
+    )
+    op.execute("""
+        INSERT INTO sb_celery_history (id, task_name, task_timestamp)
+        SELECT id, task_name, task_timestamp FROM sb_celery_history_partitioned
+    """)
+    op.execute("SELECT setval(pg_get_serial_sequence('sb_celery_history', 'id'), COALESCE((SELECT max(id) FROM sb_celery_history), 0) + 1, false)")
+    op.execute('DROP TABLE sb_celery_history_partitioned')
@@ -0,0 +1,54 @@
+import time
+
+from elar import db
+from elar.dal.managers import ClientAccountManager
+from elar.dal.secure_access import resolve_eligible_client_ids
+from elar.models import User, ClientAccount, ClientAccountUser, Contract
+
+ACCOUNTS_AMOUNT = 300
+ROUNDS = 20
+
+
+def legacy_eligible_client_ids(user):
+    client_accounts = ClientAccountManager.get_client_accounts_by_user_id(user.id)
+    return [account.id for account in client_accounts] + user.export_contracts()
+
+
+def create_accountant_with_clients(accounts_amount):
+    user = User(first_name='Bench', last_name='Mark', email='bench@mark.test', created_by_id=1)
+    db.session.add(user)
+    db.session.flush()
+    for i in range(accounts_amount):
+        office = ClientAccount(unique_name=f'bench-office-{i}', created_by_id=1)
+        client = ClientAccount(unique_name=f'bench-client-{i}', created_by_id=1)
+        db.session.add_all([office, client])
+        db.session.flush()
+        db.session.add(ClientAccountUser(user_id=user.id, client_account_id=office.id, role_id=2,
+                                         is_active=True, created_by_id=1))
+        db.session.add(Contract(accounting_client_account_id=office.id, client_account_id=client.id,
+                                created_by_id=1))
+    db.session.flush()
+    return user
+
+
+def measure(func, *args):
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        func(*args)
+    return (time.perf_counter() - started) / ROUNDS
+
+
+def test_eligible_clients_resolver_benchmark(create):
+    with create.app_context():
+        try:
+            user = create_accountant_with_clients(ACCOUNTS_AMOUNT)
+
+            assert set(resolve_eligible_client_ids(user.id)) == set(legacy_eligible_client_ids(user))
+            assert len(resolve_eligible_client_ids(user.id)) == 2 * ACCOUNTS_AMOUNT
+
+            legacy = measure(legacy_eligible_client_ids, user)
+            resolver = measure(resolve_eligible_client_ids, user.id)
+            print(f'\neligible clients for {ACCOUNTS_AMOUNT} accounts: '
+                  f'legacy {legacy * 1000:.1f} ms, single query {resolver * 1000:.1f} ms')
+        finally:
+            db.session.rollback()
@@ -0,0 +1,23 @@
+from elar import db
+from elar.common.db.keyset import keyset_paginate, encode_cursor, CURSOR_NEXT
+from elar.models import Role
+
+
+def test_keyset_pages_match_offset_pages(create):
+    with create.test_request_context():
+        query = Role.query.order_by(Role.id)
+        expected = [role.id for role in query.all()]
+
+        seen = []
+        cursor = ''
+        while cursor is not None:
+            p = keyset_paginate(query, cursor, 2)
+            seen.extend(role.id for role in p.items)
+            cursor = p.next_cursor
+        assert seen == expected
+
+        if len(expected) > 4:
+            third = keyset_paginate(query, encode_cursor(CURSOR_NEXT, expected[3]), 2)
+            back = keyset_paginate(query, third.prev_cursor, 2)
+            assert [role.id for role in back.items] == expected[2:4]
+        db.session.rollback()
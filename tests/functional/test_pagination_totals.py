@@ -0,0 +1,49 @@
+from elar import db
+from elar.common.db import totals
+from elar.common.db.totals import TOTAL_CACHED, TOTAL_ESTIMATE, TOTAL_EXACT, count_cache_key, count_total
+from elar.models import Organization, Role
+
+
+def test_small_table_is_counted_exactly(create):
+    with create.test_request_context():
+        assert count_total(Role.query) == (Role.query.count(), TOTAL_EXACT)
+
+
+def test_large_table_uses_estimate_and_cache(create):
+    with create.test_request_context():
+        create.config["PAGINATION_EXACT_COUNT_LIMIT"] = 0
+        totals.table_estimates.set(Organization.__tablename__, 123456)
+        query = Organization.query.filter(Organization.id > 0)
+        try:
+            assert count_total(Organization.query) == (123456, TOTAL_ESTIMATE)
+
+            create.redis.delete(count_cache_key(query))
+            exact, strategy = count_total(query)
+            assert strategy == TOTAL_EXACT
+            assert count_total(query.order_by(Organization.name)) == (exact, TOTAL_CACHED)
+        finally:
+            create.config.pop("PAGINATION_EXACT_COUNT_LIMIT")
+            totals.table_estimates.pop(Organization.__tablename__)
+            create.redis.delete(count_cache_key(query))
+            db.session.rollback()
+
+
+def test_estimate_only_for_bare_table_select(create):
+    with create.test_request_context():
+        create.config["PAGINATION_EXACT_COUNT_LIMIT"] = 0
+        totals.table_estimates.set(Organization.__tablename__, 123456)
+        queries = [
+            Organization.query.join(Organization.accounts),
+            db.session.query(Organization.name).distinct(),
+            db.session.query(Organization.name).group_by(Organization.name),
+        ]
+        try:
+            for query in queries:
+                create.redis.delete(count_cache_key(query))
+                assert count_total(query) == (query.order_by(None).count(), TOTAL_EXACT)
+        finally:
+            create.config.pop("PAGINATION_EXACT_COUNT_LIMIT")
+            totals.table_estimates.pop(Organization.__tablename__)
+            for query in queries:
+                create.redis.delete(count_cache_key(query))
+            db.session.rollback()
@@ -0,0 +1,109 @@
+import threading
+import time
+
+from elar import db
+from elar.dal.managers import SequenceBlock, SequenceManager
+from elar.models import ClientAccount, ClientAccountSequence, ClientAccountSequenceGap
+
+WRITERS = 8
+NUMBERS_PER_WRITER = 50
+
+
+def legacy_next_sale_invoice_number(client_account_id):
+    client_account = (
+        db.session.query(ClientAccount)
+        .with_for_update()
+        .filter(ClientAccount.id == client_account_id)
+        .first()
+    )
+    client_account.sale_invoice_seq_number = (client_account.sale_invoice_seq_number or 9999) + 1
+    return client_account.sale_invoice_seq_number
+
+
+def allocator_next_sale_invoice_number(client_account_id):
+    return SequenceManager.next_value(client_account_id, 'sale_invoice')
+
+
+def run_writers(app, allocate, client_account_id):
+    numbers = []
+    lock = threading.Lock()
+
+    def writer():
+        with app.app_context():
+            for _ in range(NUMBERS_PER_WRITER):
+                number = allocate(client_account_id)
+                db.session.commit()
+                with lock:
+                    numbers.append(number)
+            db.session.remove()
+
+    threads = [threading.Thread(target=writer) for _ in range(WRITERS)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return numbers, time.perf_counter() - started
+
+
+def create_client_account(name):
+    client_account = ClientAccount(unique_name=name, created_by_id=1)
+    db.session.add(client_account)
+    db.session.commit()
+    return client_account.id
+
+
+def cleanup(client_account_ids):
+    ClientAccountSequence.query.filter(ClientAccountSequence.client_account_id.in_(client_account_ids)).delete(
+        synchronize_session=False)
+    ClientAccount.query.filter(ClientAccount.id.in_(client_account_ids)).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def test_sequence_allocator_under_parallel_writers(create):
+    with create.app_context():
+        legacy_id = create_client_account('sequence-bench-legacy')
+        allocator_id = create_client_account('sequence-bench-allocator')
+        try:
+            legacy_numbers, legacy_time = run_writers(create, legacy_next_sale_invoice_number, legacy_id)
+            numbers, allocator_time = run_writers(create, allocator_next_sale_invoice_number, allocator_id)
+
+            total = WRITERS * NUMBERS_PER_WRITER
+            assert sorted(legacy_numbers) == list(range(10000, 10000 + total))
+            assert sorted(numbers) == list(range(10000, 10000 + total))
+            print(f'\n{WRITERS} writers x {NUMBERS_PER_WRITER} numbers: '
+                  f'row lock {total / legacy_time:.0f}/s, counter table {total / allocator_time:.0f}/s')
+        finally:
+            cleanup([legacy_id, allocator_id])
+
+
+def test_sequence_block_preallocates(create):
+    with create.app_context():
+        client_account_id = create_client_account('sequence-block')
+        try:
+            with SequenceBlock(client_account_id, 'receipt', block_size=10) as block:
+                assert [block.next() for _ in range(12)] == list(range(10000, 10012))
+            assert SequenceManager.next_value(client_account_id, 'receipt') == 10020
+
+            gap = ClientAccountSequenceGap.query.filter_by(client_account_id=client_account_id).one()
+            assert (gap.kind, gap.first_value, gap.last_value) == ('receipt', 10012, 10019)
+        finally:
+            db.session.rollback()
+            cleanup([client_account_id])
+
+
+def test_reserve_range_is_contiguous(create):
+    with create.app_context():
+        client_account_id = create_client_account('sequence-range')
+        try:
+            first = SequenceManager.reserve_range(client_account_id, 'payment', 300)
+            second = SequenceManager.reserve_range(client_account_id, 'payment', 5)
+            assert first == range(20000, 20300)
+            assert second == range(20300, 20305)
+
+            SequenceManager.release_range(client_account_id, 'payment', 20302, second[-1])
+            db.session.flush()
+            assert ClientAccountSequenceGap.query.filter_by(client_account_id=client_account_id).count() == 1
+        finally:
+            db.session.rollback()
+            cleanup([client_account_id])
@@ -0,0 +1,73 @@
+import threading
+import time
+
+from flask import current_app, g
+from sqlalchemy import text
+
+from elar import db
+from worker.app_context import run_in_app_context
+
+ROUNDS = 2000
+
+
+def task():
+    return db.session.execute(text('SELECT 1')).scalar()
+
+
+def legacy_task_call(app):
+    # context pushed (and torn down, removing the session) around every task
+    with app.app_context():
+        return task()
+
+
+def measure(func, *args):
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        func(*args)
+    return (time.perf_counter() - started) / ROUNDS
+
+
+def in_worker_thread(func, *args):
+    # the long lived context belongs to the thread, keep it out of the test thread
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(value=func(*args)))
+    thread.start()
+    thread.join()
+    return result['value']
+
+
+def test_task_context_is_reused_and_session_removed(create):
+    def run_twice():
+        contexts = [run_in_app_context(create, lambda: current_app._get_current_object()) for _ in range(2)]
+        return contexts, db.session.registry.has()
+
+    (first, second), session_left = in_worker_thread(run_twice)
+    assert first is second is create
+    assert not session_left
+
+
+def test_caller_context_is_left_alone(create):
+    with create.app_context():
+        g.marker = 'caller'
+        db.session.execute(text('SELECT 1'))
+        run_in_app_context(create, task)
+        assert g.marker == 'caller'
+        assert db.session.registry.has()
+        db.session.remove()
+
+
+def test_g_is_cleared_between_tasks(create):
+    def set_and_read():
+        run_in_app_context(create, lambda: setattr(g, 'marker', 'task'))
+        return run_in_app_context(create, lambda: g.get('marker'))
+
+    assert in_worker_thread(set_and_read) is None
+
+
+def test_task_app_context_benchmark(create):
+    # best of a few runs keeps scheduling noise out of the comparison
+    legacy = min(in_worker_thread(measure, legacy_task_call, create) for _ in range(3))
+    reused = min(in_worker_thread(measure, lambda: run_in_app_context(create, task)) for _ in range(3))
+    print(f'\nper task overhead over {ROUNDS} tasks: '
+          f'context per task {legacy * 1e6:.0f} us, long lived context {reused * 1e6:.0f} us')
+    assert reused <= legacy
@@ -0,0 +1,28 @@
+from datetime import datetime
+
+from elar import db
+from elar.models import TaskDefinition, User
+
+
+def test_next_due_date_follows_the_schedule(create):
+    with create.app_context():
+        user = User.query.first()
+        try:
+            undated = TaskDefinition(unique_name="undated", created_by_id=user.id)
+            task = TaskDefinition(
+                unique_name="monthly", created_by_id=user.id, due_date=datetime(2022, 1, 31), repeat_unit="MONTH"
+            )
+            db.session.add_all([undated, task])
+            db.session.flush()
+            assert undated.next_due_date is None
+            assert task.next_due_date == datetime(2022, 1, 31)
+
+            task.next_due_date, task.schedule_finished = None, True
+            db.session.flush()
+            assert (task.next_due_date, task.schedule_finished) == (None, True)
+
+            task.repeat_unit = "DAY"
+            db.session.flush()
+            assert (task.next_due_date, task.schedule_finished) == (datetime(2022, 1, 31), False)
+        finally:
+            db.session.rollback()
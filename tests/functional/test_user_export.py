@@ -0,0 +1,62 @@
+from sqlalchemy import event
+
+from elar import db
+from elar.models import User, ClientAccount, ClientAccountUser, Contract
+
+
+class QueryCounter():
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _count(self, *args, **kwargs):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._count)
+        return self
+
+    def __exit__(self, *args):
+        event.remove(self.engine, 'before_cursor_execute', self._count)
+
+
+def create_accountant(accounts_amount, suffix):
+    user = User(first_name='Export', last_name='Test', email=f'export-{suffix}@test.test', created_by_id=1)
+    db.session.add(user)
+    db.session.flush()
+    for i in range(accounts_amount):
+        office = ClientAccount(unique_name=f'export-{suffix}-office-{i}', organization_id=1, created_by_id=1)
+        client = ClientAccount(unique_name=f'export-{suffix}-client-{i}', created_by_id=1)
+        db.session.add_all([office, client])
+        db.session.flush()
+        db.session.add(ClientAccountUser(user_id=user.id, client_account_id=office.id, role_id=2,
+                                         is_active=True, created_by_id=1))
+        db.session.add(Contract(accounting_client_account_id=office.id, client_account_id=client.id,
+                                created_by_id=1))
+    db.session.flush()
+    return user.id
+
+
+def count_export_queries(user_id):
+    db.session.expunge_all()
+    user = User.query.get(user_id)
+    with QueryCounter(db.engine) as counter:
+        data = user.export_data()
+    return counter.count, data
+
+
+def test_user_export_query_count_does_not_grow_with_accounts(create):
+    with create.test_request_context():
+        try:
+            one_account_user_id = create_accountant(1, 'one')
+            many_accounts_user_id = create_accountant(25, 'many')
+
+            one_account_queries, _ = count_export_queries(one_account_user_id)
+            many_accounts_queries, data = count_export_queries(many_accounts_user_id)
+
+            assert len(data['accounts']) == 25
+            assert len(data['contracts']) == 25
+            assert data['accounts'][0]['account']['organization']['id'] == 1
+            assert many_accounts_queries == one_account_queries == 2
+        finally:
+            db.session.rollback()
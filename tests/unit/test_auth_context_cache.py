@@ -0,0 +1,52 @@
+from elar.services.auth_context import AuthContextCache
+
+
+class DictRedis():
+    def __init__(self):
+        self.data = {}
+        self.gets = 0
+
+    def get(self, name):
+        self.gets += 1
+        return self.data.get(name)
+
+    def setex(self, name, time, value):
+        self.data[name] = value
+
+    def delete(self, *names):
+        for name in names:
+            self.data.pop(name, None)
+
+    def bump_authz_versions(self, user_ids):
+        for user_id in user_ids:
+            key = f'authz_version:{user_id}'
+            self.data[key] = self.data.get(key, 0) + 1
+
+
+def test_context_served_from_local_cache():
+    redis = DictRedis()
+    cache = AuthContextCache(redis, local_ttl=60)
+    context = {'user': {'id': 7}, 'eligible_client_ids': [1, 2, 3]}
+
+    assert cache.get(7) is None
+    cache.set(7, context)
+    assert cache.get(7) == context
+    assert redis.gets == 1  # only the initial miss reached redis
+
+
+def test_context_shared_through_redis():
+    redis = DictRedis()
+    context = {'user': {'id': 7}, 'eligible_client_ids': [1]}
+    AuthContextCache(redis).set(7, context)
+
+    assert AuthContextCache(redis).get(7) == context
+
+
+def test_invalidate_drops_both_levels():
+    redis = DictRedis()
+    cache = AuthContextCache(redis, local_ttl=60)
+    cache.set(7, {'user': {'id': 7}, 'eligible_client_ids': []})
+
+    cache.invalidate([7, None])
+    assert cache.get(7) is None
+    assert redis.data == {'authz_version:7': 1}
@@ -0,0 +1,49 @@
+import time
+from datetime import datetime
+
+from elar.utils.batch_buffer import BatchBuffer
+
+
+class Writer():
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.batches = []
+
+    def __call__(self, rows):
+        if self.fail:
+            raise RuntimeError('database is gone')
+        self.batches.append(rows)
+
+
+def test_flushes_in_bulk_on_size():
+    writer = Writer()
+    history = BatchBuffer(writer, max_size=3, max_age=0)
+    for i in range(7):
+        history.add(f'Task{i}', datetime(2022, 10, 18))
+    assert [len(batch) for batch in writer.batches] == [3, 3]
+    assert len(history) == 1
+    assert history.flush() == 1
+    assert [len(batch) for batch in writer.batches] == [3, 3, 1]
+
+
+def test_flushes_on_age():
+    writer = Writer()
+    history = BatchBuffer(writer, max_size=100, max_age=0.05)
+    history.add('Task', datetime(2022, 10, 18))
+    deadline = time.monotonic() + 2
+    while not writer.batches and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert writer.batches == [[('Task', datetime(2022, 10, 18))]]
+    assert len(history) == 0
+
+
+def test_keeps_rows_of_failed_write():
+    writer = Writer(fail=True)
+    history = BatchBuffer(writer, max_size=2, max_age=0, max_pending=3)
+    for i in range(4):
+        history.add(f'Task{i}', datetime(2022, 10, 18))
+    assert [name for name, _ in history._rows] == ['Task1', 'Task2', 'Task3']
+
+    writer.fail = False
+    assert history.flush() == 3
+    assert len(history) == 0
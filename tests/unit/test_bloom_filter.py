@@ -0,0 +1,21 @@
+import hashlib
+
+from elar.utils.bloom_filter import BloomFilter
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    items = [hashlib.sha256(str(i).encode()).hexdigest() for i in range(1000)]
+    for item in items:
+        bloom.add(item)
+
+    assert all(item in bloom for item in items)
+
+
+def test_bloom_filter_false_positive_rate():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f'denied-{i}')
+
+    false_positives = sum(f'allowed-{i}' in bloom for i in range(10000))
+    assert false_positives < 300
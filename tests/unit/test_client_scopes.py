@@ -0,0 +1,31 @@
+import pytest
+
+from elar.authorization.user_context import ScopedPrincipal
+from elar.authorization.scopes import MAX_SCOPES_BYTES, encode_client_scopes, decode_client_scopes
+
+
+def test_client_scopes_round_trip():
+    client_ids = [3, 7, 8, 1003, 2048]
+    scopes = encode_client_scopes(client_ids)
+    assert scopes.startswith('3.')
+    assert decode_client_scopes(scopes) == sorted(client_ids)
+
+
+def test_empty_client_scopes():
+    assert encode_client_scopes([]) == ''
+    assert decode_client_scopes('') == []
+
+
+def test_sparse_client_scopes_are_not_encoded():
+    assert encode_client_scopes([5, 5 + 190000]) is None
+    assert encode_client_scopes([5, 5 + MAX_SCOPES_BYTES * 8]) is None
+    scopes = encode_client_scopes([5, 5 + MAX_SCOPES_BYTES * 8 - 1])
+    assert len(scopes) < MAX_SCOPES_BYTES * 2
+    assert decode_client_scopes(scopes) == [5, 5 + MAX_SCOPES_BYTES * 8 - 1]
+
+
+def test_scoped_principal_holds_only_token_claims():
+    principal = ScopedPrincipal(7, True)
+    assert (principal.id, principal.email_verified) == (7, True)
+    with pytest.raises(AttributeError):
+        principal.first_name
@@ -0,0 +1,17 @@
+import pytest
+
+from elar.common.db.keyset import encode_cursor, decode_cursor, CURSOR_NEXT, CURSOR_PREV
+from elar.common.exceptions import ValidationError
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(CURSOR_NEXT, 42)) == (CURSOR_NEXT, 42)
+    assert decode_cursor('') == (CURSOR_NEXT, None)
+    with pytest.raises(ValidationError):
+        decode_cursor('not-a-cursor')
+
+
+@pytest.mark.parametrize('key', [None, '42', 4.2, True, [42], {'id': 42}])
+def test_cursor_with_non_integer_key_is_rejected(key):
+    with pytest.raises(ValidationError):
+        decode_cursor(encode_cursor(CURSOR_PREV, key))
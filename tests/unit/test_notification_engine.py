@@ -0,0 +1,55 @@
+import pytest
+from jinja2 import DictLoader, Environment, select_autoescape
+
+from elar.common.exceptions import ValidationError
+from elar.notification.email_trigger import NewUser
+from elar.notification.engine import NotificationEngine, group_recipients, usecases_by_trigger
+
+
+class CountingLoader(DictLoader):
+    loads = 0
+
+    def get_source(self, environment, template):
+        CountingLoader.loads += 1
+        return super().get_source(environment, template)
+
+
+def make_engine():
+    env = Environment(
+        loader=CountingLoader({
+            'snapbooks/invite_account.html': '<a href="{{ invited_url }}">{{ client_account }}</a>',
+        }),
+        autoescape=select_autoescape(['html']),
+    )
+    return NotificationEngine(env)
+
+
+def test_usecases_are_indexed_by_trigger_name():
+    assert usecases_by_trigger[NewUser.INVITE_ACCOUNT]['template'] == 'snapbooks/invite_account.html'
+
+
+def test_identical_renders_are_shared_by_recipients():
+    engine = make_engine()
+    context = {'client_account': 'Fjord & Co', 'invited_url': 'https://localhost/invite'}
+    recipients = [(f'accountant-{i}@test.test', dict(context)) for i in range(50)]
+    recipients.append(('other@test.test', {'client_account': 'Other', 'invited_url': 'https://localhost/other'}))
+
+    groups = group_recipients(recipients)
+    payloads = engine.build_payloads(NewUser.INVITE_ACCOUNT, groups)
+
+    assert len(groups) == 2
+    assert len(payloads) == 51
+    assert CountingLoader.loads == 1
+    assert payloads[0]['subject'] == 'Join Fjord & Co on SnapBooks'
+    assert 'Fjord &amp; Co' in payloads[0]['html']
+    assert payloads[0]['recipients'] == ['accountant-0@test.test']
+    assert payloads[0]['sender'] == 'Client <norely@snapbooks.app>'
+
+
+def test_missing_tags_and_unknown_triggers_are_rejected():
+    engine = make_engine()
+    usecase = engine.get_usecase(NewUser.INVITE_ACCOUNT)
+    with pytest.raises(ValidationError):
+        engine.validate_context(usecase, {'client_account': 'Fjord'})
+    with pytest.raises(ValidationError):
+        engine.get_usecase('No Such Trigger')
@@ -0,0 +1,27 @@
+from flask import Flask
+
+from elar.common.db.paginate import PageLinks
+
+
+class Page():
+    def __init__(self, page, pages):
+        self.page = page
+        self.pages = pages
+        self.has_prev = page > 1
+        self.has_next = page < pages
+        self.prev_num = page - 1
+        self.next_num = page + 1
+
+
+def test_page_links_match_url_for():
+    app = Flask(__name__)
+    app.add_url_rule('/items/<int:owner_id>', 'items', lambda owner_id: '')
+
+    with app.test_request_context('/items/7'):
+        from flask import url_for
+        links = PageLinks(endpoint='items', per_page=25, expanded=1, owner_id=7)
+        urls = links.page_urls(Page(2, 3))
+
+        for name, page in (('prev_url', 1), ('next_url', 3), ('first_url', 1), ('last_url', 3)):
+            assert urls[name] == url_for('items', page=page, per_page=25, expanded=1, owner_id=7, _external=True)
+        assert links.page_urls(Page(1, 1))['prev_url'] is None
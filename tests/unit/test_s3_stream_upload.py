@@ -0,0 +1,131 @@
+import hashlib
+import io
+
+from botocore.exceptions import ClientError
+from flask import Flask
+
+from elar.utils import s3_tools
+
+
+class SetRedis():
+    def __init__(self):
+        self.sets = {}
+
+    def sismember(self, name, value):
+        return value in self.sets.get(name, set())
+
+    def sadd(self, name, *values):
+        self.sets.setdefault(name, set()).update(values)
+
+
+class FakeS3():
+    def __init__(self):
+        self.objects = {}
+        self.uploads = {}
+        self.puts = 0
+
+    def head_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise ClientError({'Error': {'Code': '404'}}, 'HeadObject')
+        return {}
+
+    def put_object(self, Body, Bucket, Key, **kwargs):
+        self.puts += 1
+        self.objects[Key] = bytes(Body)
+
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        self.uploads['1'] = {}
+        return {'UploadId': '1'}
+
+    def upload_part(self, Body, Bucket, Key, UploadId, PartNumber):
+        self.uploads[UploadId][PartNumber] = bytes(Body)
+        return {'ETag': f'etag-{PartNumber}'}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        parts = self.uploads.pop(UploadId)
+        self.objects[Key] = b''.join(parts[part['PartNumber']] for part in MultipartUpload['Parts'])
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.uploads.pop(UploadId, None)
+
+    def copy(self, source, bucket, key, ExtraArgs=None):
+        self.objects[key] = self.objects[source['Key']]
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop(Key, None)
+
+
+def upload(monkeypatch, body, part_size, s3=None, redis=None):
+    s3 = s3 or FakeS3()
+    monkeypatch.setattr(s3_tools, 'get_client', lambda *args, **kwargs: s3)
+    app = Flask(__name__)
+    app.redis = redis or SetRedis()
+    app.config['AWS'] = {'region_name': 'eu-north-1'}
+    app.config['UPLOAD_DOC_S3_BUCKET'] = 'docs'
+    with app.app_context():
+        key, url = s3_tools.store_stream_to_s3_bucket(io.BytesIO(body), 'scan.pdf', 'application/pdf',
+                                                      sub_folder='inbox', part_size=part_size)
+    return s3, key, url
+
+
+def test_small_stream_is_put_directly(monkeypatch):
+    body = b'small file'
+    s3, key, url = upload(monkeypatch, body, part_size=1024)
+
+    assert key == f'inbox/{hashlib.sha256(body).hexdigest()}.pdf'
+    assert url == f'https://docs.s3.eu-north-1.amazonaws.com/{key}'
+    assert s3.objects == {key: body}
+
+
+def test_large_stream_is_hashed_while_uploaded_in_parts(monkeypatch):
+    body = bytes(range(256)) * 40
+    s3, key, _ = upload(monkeypatch, body, part_size=1000)
+
+    assert key == f'inbox/{hashlib.sha256(body).hexdigest()}.pdf'
+    assert s3.objects == {key: body}
+    assert not s3.uploads
+
+
+def test_known_content_is_not_uploaded_again(monkeypatch):
+    s3, redis = FakeS3(), SetRedis()
+    body = b'same invoice'
+    upload(monkeypatch, body, part_size=1024, s3=s3, redis=redis)
+    upload(monkeypatch, body, part_size=1024, s3=s3, redis=redis)
+    assert s3.puts == 1
+
+    # index lost: HEAD finds the object and restores the index entry
+    redis.sets.clear()
+    _, key, _ = upload(monkeypatch, body, part_size=1024, s3=s3, redis=redis)
+    assert s3.puts == 1
+    assert redis.sismember('uploaded_objects:docs/inbox', key)
+
+
+class SigningS3():
+    def __init__(self):
+        self.signed = []
+
+    def generate_presigned_url(self, method, Params, ExpiresIn):
+        self.signed.append(Params['Key'])
+        return f"https://{Params['Bucket']}/{Params['Key']}?expires={ExpiresIn}"
+
+
+def test_presigned_urls_sign_missing_keys_with_one_client(monkeypatch):
+    clients = []
+
+    def configure_s3_client():
+        clients.append(SigningS3())
+        return clients[-1]
+
+    monkeypatch.setattr(s3_tools, 'configure_s3_client', configure_s3_client)
+    monkeypatch.setattr(s3_tools, 'presigned_urls', s3_tools.TTLCache(maxsize=10))
+
+    urls = s3_tools.create_presigned_urls('bucket', ['a.png', 'b.png', 'a.png'])
+    assert urls == {'a.png': 'https://bucket/a.png?expires=3600', 'b.png': 'https://bucket/b.png?expires=3600'}
+    assert len(clients) == 1 and sorted(clients[0].signed) == ['a.png', 'b.png']
+
+    urls = s3_tools.create_presigned_urls('bucket', ['a.png', 'c.png'])
+    assert urls['a.png'] == 'https://bucket/a.png?expires=3600'
+    assert len(clients) == 2 and clients[1].signed == ['c.png']
+
+    s3_tools.create_presigned_urls('bucket', ['b.png'])
+    assert len(clients) == 2
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from flask import Flask
+
+from elar.sensors import MEASUREMENT_BATCH_TASK, validate_measurements
+from elar.sensors.measurements import enqueue_measurements
+from elar.utils.batch_buffer import BatchBuffer
+
+NOW = datetime(2022, 10, 18, 12)
+
+
+def test_valid_readings_in_all_timestamp_formats():
+    epoch = datetime(2022, 10, 18, 11, tzinfo=timezone.utc).timestamp()
+    rows, dropped = validate_measurements([
+        (1, 21.5, NOW),
+        [2, 22, '2022-10-18T13:30:00+02:00'],
+        (3, -4.25, epoch),
+    ], -60, 150, now=NOW)
+    assert dropped == 0
+    assert rows == [
+        {'sensor_id': 1, 'value': 21.5, 'measured_at': NOW},
+        {'sensor_id': 2, 'value': 22.0, 'measured_at': datetime(2022, 10, 18, 11, 30)},
+        {'sensor_id': 3, 'value': -4.25, 'measured_at': datetime(2022, 10, 18, 11)},
+    ]
+
+
+def test_invalid_readings_are_dropped():
+    rows, dropped = validate_measurements([
+        (0, 21.5, NOW),
+        ('1', 21.5, NOW),
+        (1, float('nan'), NOW),
+        (1, 151, NOW),
+        (1, True, NOW),
+        (1, 21.5, 'yesterday'),
+        (1, 21.5, NOW + timedelta(hours=1)),
+        (1, 21.5),
+        None,
+        (1, 21.5, NOW - timedelta(minutes=1)),
+    ], -60, 150, now=NOW)
+    assert rows == [{'sensor_id': 1, 'value': 21.5, 'measured_at': NOW - timedelta(minutes=1)}]
+    assert dropped == 9
+
+
+def test_last_reading_of_the_same_moment_wins():
+    rows, dropped = validate_measurements([(1, 20, NOW), (1, 21, NOW), (2, 20, NOW)], -60, 150, now=NOW)
+    assert [(row['sensor_id'], row['value']) for row in rows] == [(1, 21.0), (2, 20.0)]
+    assert dropped == 1
+
+
+def test_empty_batch():
+    assert validate_measurements([], -60, 150) == ([], 0)
+
+
+def test_producer_coalesces_readings_into_one_task():
+    sent = []
+    app = Flask('producer')
+    app.celery = SimpleNamespace(send_task=lambda name, args: sent.append((name, args)))
+    batcher = BatchBuffer(enqueue_measurements, max_size=100, max_age=0)
+    batcher.init_app(app, max_size=3)
+
+    batcher.add(1, 21.5, NOW)
+    batcher.add(2, 22, NOW)
+    assert sent == []
+    batcher.add(1, 21.75, NOW + timedelta(seconds=1))
+
+    assert sent == [(MEASUREMENT_BATCH_TASK, [[
+        [1, 21.5, '2022-10-18T12:00:00'],
+        [2, 22, '2022-10-18T12:00:00'],
+        [1, 21.75, '2022-10-18T12:00:01'],
+    ]])]
+    rows, dropped = validate_measurements(sent[0][1][0], -60, 150, now=NOW)
+    assert dropped == 0
+    assert len(rows) == 3
@@ -0,0 +1,52 @@
+from elar.common.serialization import export_item, export_items, get_export_spec
+
+
+class Plain():
+    def export_data(self):
+        return {'kind': 'plain'}
+
+
+class Expandable():
+    prepared = []
+
+    def export_data(self, expand=['all']):
+        return {'kind': 'expandable', 'expand': expand}
+
+    @staticmethod
+    def prepare_export(items):
+        Expandable.prepared.append(len(items))
+
+
+class Declared():
+    export_accepts_expand = True
+
+    def export_data(self, **kwargs):
+        return {'kind': 'declared', 'expand': kwargs.get('expand')}
+
+
+def test_export_spec_is_resolved_once_per_class():
+    assert get_export_spec(Plain) is get_export_spec(Plain)
+    assert get_export_spec(Plain).accepts_expand is False
+    assert get_export_spec(Expandable).accepts_expand is True
+    assert get_export_spec(Declared).accepts_expand is True
+
+
+def test_export_item_passes_expand_when_accepted():
+    assert export_item(Plain(), expand=['a']) == {'kind': 'plain'}
+    assert export_item(Expandable(), expand=None) == {'kind': 'expandable', 'expand': None}
+    assert export_item(Declared(), expand=['a']) == {'kind': 'declared', 'expand': ['a']}
+
+
+def test_export_items_prepares_page_once():
+    Expandable.prepared = []
+    items = [Expandable(), Plain(), Expandable()]
+
+    results = export_items(items, expand=['x'])
+
+    assert Expandable.prepared == [2]
+    assert results == [
+        {'kind': 'expandable', 'expand': ['x']},
+        {'kind': 'plain'},
+        {'kind': 'expandable', 'expand': ['x']},
+    ]
+    assert export_items(items)[0] == {'kind': 'expandable', 'expand': ['all']}
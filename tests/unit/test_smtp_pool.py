@@ -0,0 +1,64 @@
+import smtplib
+
+from worker.email.smtp_pool import PooledMailConnection
+
+
+class FakeConnection():
+    def __init__(self, mail):
+        self.mail = mail
+        self.sent = []
+
+    def __enter__(self):
+        self.mail.opened += 1
+        return self
+
+    def __exit__(self, *args):
+        self.mail.closed += 1
+
+    def send(self, message):
+        if self.mail.disconnect_next:
+            self.mail.disconnect_next = False
+            raise smtplib.SMTPServerDisconnected('gone')
+        self.mail.sent.append(message)
+
+
+class FakeMail():
+    def __init__(self):
+        self.opened = 0
+        self.closed = 0
+        self.sent = []
+        self.disconnect_next = False
+
+    def connect(self):
+        return FakeConnection(self)
+
+
+def test_connection_is_reused_between_batches():
+    mail = FakeMail()
+    pool = PooledMailConnection(mail)
+
+    assert pool.send_all(['a', 'b']) == []
+    assert pool.send_all(['c']) == []
+    assert mail.sent == ['a', 'b', 'c']
+    assert mail.opened == 1
+
+
+def test_reconnects_after_server_disconnect():
+    mail = FakeMail()
+    pool = PooledMailConnection(mail)
+    pool.send_all(['a'])
+
+    mail.disconnect_next = True
+    assert pool.send_all(['b']) == []
+    assert mail.sent == ['a', 'b']
+    assert mail.opened == 2
+
+
+def test_idle_connection_is_dropped():
+    mail = FakeMail()
+    pool = PooledMailConnection(mail, idle_timeout=0)
+    pool.send_all(['a'])
+    pool.send_all(['b'])
+
+    assert mail.opened == 2
+    assert mail.closed == 1
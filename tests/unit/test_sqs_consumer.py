@@ -0,0 +1,85 @@
+import json
+import threading
+
+from botocore.exceptions import ClientError
+
+from worker.sqs import LocalQueue, SqsConsumer, parse_s3_records
+
+
+def s3_event(*keys):
+    return json.dumps({'Records': [
+        {'s3': {'bucket': {'name': 'inbound'}, 'object': {'key': key}}} for key in keys
+    ]})
+
+
+def test_parse_s3_records_reads_all_records():
+    assert parse_s3_records(s3_event('a+b.eml', 'c.eml')) == [('inbound', 'a b.eml'), ('inbound', 'c.eml')]
+    assert parse_s3_records(json.dumps({'Event': 's3:TestEvent'})) == []
+
+
+def test_consumer_handles_batch_and_acknowledges_at_once():
+    queue = LocalQueue()
+    for i in range(12):
+        queue.send(s3_event(f'{i}-1.eml', f'{i}-2.eml'))
+    handled = []
+    lock = threading.Lock()
+
+    def handler(bucket_name, object_key):
+        with lock:
+            handled.append(object_key)
+
+    consumer = SqsConsumer(queue, handler, wait_time=0)
+    assert consumer.poll() == 10
+    assert consumer.poll() == 2
+    assert consumer.poll() == 0
+    assert len(handled) == 24
+    assert not queue.in_flight
+
+
+def test_consumer_keeps_failed_messages():
+    queue = LocalQueue()
+    queue.send(s3_event('good.eml'))
+    queue.send(s3_event('good-too.eml', 'bad.eml'))
+    queue.send('not json')
+
+    def handler(bucket_name, object_key):
+        if object_key == 'bad.eml':
+            raise ValueError('broken email')
+
+    consumer = SqsConsumer(queue, handler, wait_time=0)
+    assert consumer.poll() == 2
+    assert list(queue.in_flight.values()) == [s3_event('good-too.eml', 'bad.eml')]
+    queue.release()
+    assert len(queue.visible) == 1
+
+
+class FlakyQueue(LocalQueue):
+    def __init__(self):
+        super().__init__()
+        self.errors = 1
+
+    def receive(self, max_messages=10, wait_time=0):
+        if self.errors:
+            self.errors -= 1
+            raise ClientError({'Error': {'Code': 'ThrottlingException', 'Message': 'Rate exceeded'}}, 'ReceiveMessage')
+        return super().receive(max_messages, wait_time)
+
+
+def test_consumer_survives_sqs_errors():
+    queue = FlakyQueue()
+    queue.send(s3_event('after-error.eml'))
+    stop_event = threading.Event()
+    handled = []
+
+    def handler(bucket_name, object_key):
+        handled.append(object_key)
+        stop_event.set()
+
+    consumer = SqsConsumer(queue, handler, wait_time=0, error_delay=0.01)
+    runner = threading.Thread(target=consumer.run, args=(stop_event,))
+    runner.start()
+    runner.join(timeout=5)
+
+    assert not runner.is_alive()
+    assert queue.errors == 0
+    assert handled == ['after-error.eml']
@@ -0,0 +1,53 @@
+from flask import Flask
+
+from elar.api_v1.health import verify_metrics_token
+from elar.utils.task_metrics import (
+    OUTCOME_FAILURE, OUTCOME_RETRY, OUTCOME_SUCCESS, metric_fields, render_metrics
+)
+
+
+def test_fields_of_observations():
+    fields = metric_fields([
+        ('EmailDispatchTask', 0.02, 0.3, OUTCOME_SUCCESS),
+        ('EmailDispatchTask', None, 7, OUTCOME_RETRY),
+    ])
+    assert fields['celery_task_queue_wait_seconds_count|EmailDispatchTask|'] == 1
+    assert fields['celery_task_queue_wait_seconds_bucket|EmailDispatchTask|0.025'] == 1
+    assert fields['celery_task_queue_wait_seconds_bucket|EmailDispatchTask|0.01'] == 0
+    assert fields['celery_task_run_seconds_bucket|EmailDispatchTask|0.5'] == 1
+    assert fields['celery_task_run_seconds_bucket|EmailDispatchTask|10.0'] == 2
+    assert fields['celery_task_run_seconds_bucket|EmailDispatchTask|+Inf'] == 2
+    assert fields['celery_task_run_seconds_sum|EmailDispatchTask|'] == 7.3
+    assert fields['celery_task_outcomes_total|EmailDispatchTask|retry'] == 1
+    assert fields['celery_task_retries_total|EmailDispatchTask|'] == 1
+
+
+def test_render_sums_of_all_processes():
+    fields = metric_fields([('NotificationTask', 1.5, 0.2, OUTCOME_SUCCESS)])
+    fields.update(metric_fields([('NotificationTask', 0.5, 0.1, OUTCOME_FAILURE)]))
+    text = render_metrics(fields)
+    lines = text.splitlines()
+
+    assert '# TYPE celery_task_run_seconds histogram' in lines
+    assert 'celery_task_run_seconds_count{task="NotificationTask"} 2' in lines
+    assert 'celery_task_queue_wait_seconds_bucket{task="NotificationTask",le="0.5"} 1' in lines
+    assert 'celery_task_queue_wait_seconds_bucket{task="NotificationTask",le="+Inf"} 2' in lines
+    assert 'celery_task_outcomes_total{task="NotificationTask",outcome="failure"} 1' in lines
+    assert 'celery_task_retries_total' not in text
+    buckets = [line for line in lines if line.startswith('celery_task_run_seconds_bucket')]
+    assert buckets[0].startswith('celery_task_run_seconds_bucket{task="NotificationTask",le="0.005"}')
+    assert buckets[-1].endswith('le="+Inf"} 2')
+
+
+def test_render_nothing_observed():
+    assert render_metrics({}) == '\n'
+
+
+def test_metrics_need_the_configured_token():
+    app = Flask(__name__)
+    with app.app_context():
+        assert not verify_metrics_token('secret')
+        app.config['METRICS_TOKEN'] = 'secret'
+        assert verify_metrics_token('secret')
+        assert not verify_metrics_token('other')
+        assert not verify_metrics_token('')
@@ -0,0 +1,12 @@
+from elar.notification.email_dispatch import EMAIL_DISPATCH_TASK
+from elar.notification.engine import NOTIFICATION_TASK
+from worker import CELERY_TASKS
+from worker.queues import QUEUES, QUEUE_MAIL
+
+
+def test_every_task_is_routed_to_a_lane():
+    assert all(task.queue in QUEUES for task in CELERY_TASKS)
+
+
+def test_only_mail_shares_the_mail_lane():
+    assert {task.name for task in CELERY_TASKS if task.queue == QUEUE_MAIL} == {EMAIL_DISPATCH_TASK, NOTIFICATION_TASK}
@@ -0,0 +1,81 @@
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+from elar.dal.task_scheduler import add_months, expand_definition
+
+START = datetime(2022, 1, 1)
+
+
+def definition(**kwargs):
+    values = dict(
+        repeat_unit='MONTH', repeat_frequency=1, active_from=None, active_to=None,
+        due_date=datetime(2022, 1, 31, 12), notification1_date=datetime(2022, 1, 24, 12),
+        notification2_date=None,
+    )
+    values.update(kwargs)
+    values.setdefault('next_due_date', values['due_date'])
+    return SimpleNamespace(**values)
+
+
+def test_add_months_clamps_to_month_end():
+    assert add_months(datetime(2022, 1, 31), 1) == datetime(2022, 2, 28)
+    assert add_months(datetime(2022, 1, 31), 2) == datetime(2022, 3, 31)
+    assert add_months(datetime(2022, 11, 30), 3) == datetime(2023, 2, 28)
+
+
+def test_expand_definition_is_incremental():
+    task = definition()
+    rows, next_due_date = expand_definition(task, START, datetime(2022, 3, 1))
+    assert rows == [
+        (datetime(2022, 1, 31, 12), 1, datetime(2022, 1, 24, 12)),
+        (datetime(2022, 2, 28, 12), 1, datetime(2022, 2, 21, 12)),
+    ]
+    assert next_due_date == datetime(2022, 3, 31, 12)
+
+    task.next_due_date = next_due_date
+    rows, next_due_date = expand_definition(task, START, datetime(2022, 3, 1))
+    assert rows == []
+    assert next_due_date == datetime(2022, 3, 31, 12)
+
+
+def test_expand_definition_stops_at_active_to():
+    task = definition(repeat_unit='DAY', repeat_frequency=7, active_to=date(2022, 2, 10),
+                      due_date=datetime(2022, 1, 27), notification1_date=None,
+                      notification2_date=datetime(2022, 1, 26))
+    rows, next_due_date = expand_definition(task, datetime(2022, 1, 20), datetime(2022, 12, 31))
+    assert [row[0] for row in rows] == [datetime(2022, 1, 27), datetime(2022, 2, 3), datetime(2022, 2, 10)]
+    assert {row[1] for row in rows} == {2}
+    assert all(row[0] - row[2] == timedelta(days=1) for row in rows)
+    assert next_due_date is None
+
+
+def test_expand_onetime_definition():
+    task = definition(repeat_unit='ONETIME')
+    rows, next_due_date = expand_definition(task, START, datetime(2022, 2, 1))
+    assert len(rows) == 1
+    assert next_due_date is None
+
+
+def test_past_occurrences_are_not_backfilled():
+    task = definition(due_date=datetime(2021, 6, 30, 12), notification1_date=datetime(2021, 6, 23, 12))
+    now = datetime(2022, 1, 15)
+    rows, next_due_date = expand_definition(task, now, now + timedelta(days=45))
+    assert rows == [
+        (datetime(2022, 1, 30, 12), 1, datetime(2022, 1, 23, 12)),
+        (datetime(2022, 2, 28, 12), 1, datetime(2022, 2, 21, 12)),
+    ]
+    assert next_due_date == datetime(2022, 3, 30, 12)
+
+
+def test_past_onetime_definition_is_finished():
+    task = definition(repeat_unit='ONETIME')
+    rows, next_due_date = expand_definition(task, datetime(2022, 2, 1), datetime(2022, 3, 1))
+    assert rows == []
+    assert next_due_date is None
+
+
+def test_unset_next_due_date_starts_at_due_date():
+    task = definition(next_due_date=None)
+    rows, next_due_date = expand_definition(task, START, datetime(2022, 3, 1))
+    assert [row[0] for row in rows] == [datetime(2022, 1, 31, 12), datetime(2022, 2, 28, 12)]
+    assert next_due_date == datetime(2022, 3, 31, 12)
@@ -0,0 +1,54 @@
+import time
+
+from jinja2 import Environment, PackageLoader, select_autoescape
+
+from elar.utils.template_cache import make_bytecode_cache, warm_up_templates
+
+TEMPLATE = 'reset_password.html'
+CONTEXT = {'reset_url': 'https://localhost/reset-password/token'}
+
+
+def first_render(bytecode_cache):
+    env = Environment(
+        loader=PackageLoader('elar', 'mail_templates'),
+        autoescape=select_autoescape(['html']),
+        bytecode_cache=bytecode_cache,
+    )
+    started = time.perf_counter()
+    html = env.get_template(TEMPLATE).render(**CONTEXT)
+    return html, time.perf_counter() - started, env
+
+
+def test_bytecode_cache_first_render_benchmark(tmp_path):
+    config = {'MAIL_TEMPLATE_CACHE_DIR': str(tmp_path)}
+
+    cold_html, cold, _ = first_render(None)
+    _, _, env = first_render(make_bytecode_cache(config))
+    assert TEMPLATE in warm_up_templates(env)
+    assert list(tmp_path.iterdir())
+
+    cached_html, cached, _ = first_render(make_bytecode_cache(config))
+    started = time.perf_counter()
+    env.get_template(TEMPLATE).render(**CONTEXT)
+    warm = time.perf_counter() - started
+
+    assert cached_html == cold_html
+    print(f'\nfirst render of {TEMPLATE}: compile {cold * 1000:.2f} ms, '
+          f'bytecode cache {cached * 1000:.2f} ms, warmed env {warm * 1000:.2f} ms')
+
+
+def test_bytecode_cache_can_be_disabled():
+    assert make_bytecode_cache({'MAIL_TEMPLATE_BYTECODE_CACHE': None}) is None
+
+
+def test_shared_cache_directory_is_not_used(tmp_path):
+    shared = tmp_path / 'shared'
+    shared.mkdir()
+    shared.chmod(0o777)
+    assert make_bytecode_cache({'MAIL_TEMPLATE_CACHE_DIR': str(shared)}).directory != str(shared)
+
+
+def test_cache_directory_is_created_private(tmp_path):
+    directory = tmp_path / 'mail-templates'
+    assert make_bytecode_cache({'MAIL_TEMPLATE_CACHE_DIR': str(directory)}).directory == str(directory)
+    assert directory.stat().st_mode & 0o777 == 0o700
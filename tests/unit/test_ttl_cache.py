@@ -0,0 +1,25 @@
+import time
+
+from elar.utils.ttl_cache import TTLCache
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(ttl=60)
+    cache.set('long', 1)
+    cache.set('short', 2, ttl=0.01)
+    time.sleep(0.02)
+
+    assert cache.get('long') == 1
+    assert cache.get('short') is None
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+    assert len(cache) == 2
@@ -1,13 +1,35 @@
 # -*- coding: utf-8 -*-
-from celery import Celery
+from celery import Celery, current_app as current_celery_app
+from celery.signals import worker_process_init
 from flask import Flask
-from .temperature_sensors import TemperatureSensorTask
+from .temperature_sensors import TemperatureSensorTask, TemperatureSensorBatchTask
+from .uploads import UploadIndexReconcileTask
+from .email import EmailDispatchTask
+from .notifications import NotificationTask
+from .task_scheduler import TaskNotificationSchedulerTask
+from .task_history import CeleryHistoryPartitionTask
+from .base_task import task_history
+from .metrics import task_metrics
+from .app_context import reset_engine, run_in_app_context
+from .queues import QUEUE_BULK
 
 CELERY_TASKS = (
     TemperatureSensorTask,
+    TemperatureSensorBatchTask,
+    UploadIndexReconcileTask,
+    EmailDispatchTask,
+    NotificationTask,
+    TaskNotificationSchedulerTask,
+    CeleryHistoryPartitionTask,
 )
 
 
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    # the celery app of the worker is the default one, see make_celery()
+    reset_engine(current_celery_app.flask_app)
+
+
 def make_celery(app: Flask):
     celery = Celery(
         app.import_name,
@@ -17,13 +39,43 @@ def make_celery(app: Flask):
     celery.flask_app = app
     celery.conf.update(app.config)
 
+    # lanes (see worker.queues) are consumed by dedicated worker pools, so a
+    # backlog of bulk jobs never delays a password reset email
+    celery.conf.task_default_queue = QUEUE_BULK
+    celery.conf.task_routes = {
+        **{task.name: {"queue": task.queue} for task in CELERY_TASKS},
+        **app.config.get("CELERY_TASK_ROUTES", {}),
+    }
+
     class ContextTask(celery.Task):  # type: ignore
         def __call__(self, *args, **kwargs):
-            with app.app_context():
-                return self.run(*args, **kwargs)
+            return run_in_app_context(app, super().__call__, *args, **kwargs)
 
     celery.Task = ContextTask
 
+    celery.conf.beat_schedule = {
+        "schedule-task-notifications": {
+            "task": TaskNotificationSchedulerTask.name,
+            "schedule": app.config.get("TASK_SCHEDULER_INTERVAL", 300),
+        },
+        "ensure-celery-history-partitions": {
+            "task": CeleryHistoryPartitionTask.name,
+            "schedule": 24 * 60 * 60,
+        },
+        **(celery.conf.beat_schedule or {}),
+    }
+
+    task_history.init_app(
+        app,
+        max_size=app.config.get("CELERY_HISTORY_BUFFER_SIZE", 100),
+        max_age=app.config.get("CELERY_HISTORY_FLUSH_INTERVAL", 5),
+    )
+    task_metrics.init_app(
+        app,
+        max_size=app.config.get("CELERY_METRICS_BUFFER_SIZE", 1000),
+        max_age=app.config.get("CELERY_METRICS_FLUSH_INTERVAL", 10),
+    )
+
     celery.set_default()
     for task in CELERY_TASKS:
         task.bind(celery)  # type: ignore
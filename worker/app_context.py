@@ -0,0 +1,48 @@
+import threading
+
+from flask import g, has_app_context
+
+from elar import db
+
+_local = threading.local()
+
+
+def ensure_app_context(app):
+    """
+    Push the app context once per worker thread and keep it for the life of
+    the thread, instead of pushing (and tearing down) one for every task.
+    A context already pushed by the caller (eager tasks, tests) is reused.
+    Returns True when the current context is the worker's own one.
+    """
+    if not has_app_context():
+        context = app.app_context()
+        context.push()
+        _local.context = context
+    context = getattr(_local, 'context', None)
+    return context is not None and g._get_current_object() is context.g
+
+
+def reset_engine(app):
+    """
+    Called in a freshly forked worker process: pooled connections inherited
+    from the parent must not be used by two processes.
+    """
+    with app.app_context():
+        db.get_engine(app).dispose()
+
+
+def run_in_app_context(app, call, *args, **kwargs):
+    """
+    Run the task call within the long lived app context. The scoped session is
+    removed and g is cleared after every task, which the app context teardown
+    did before: the connection goes back to the pool and no objects (or an
+    aborted transaction) leak into the next task. Within a context pushed by
+    the caller both belong to the caller and are left alone.
+    """
+    if not ensure_app_context(app):
+        return call(*args, **kwargs)
+    try:
+        return call(*args, **kwargs)
+    finally:
+        db.session.remove()
+        _local.context.g = app.app_ctx_globals_class()
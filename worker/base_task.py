@@ -1,25 +1,54 @@
 import os
+import time
 from celery.app.task import Task
+from celery.exceptions import Retry
+from celery.signals import worker_process_shutdown, worker_shutdown
 from celery.utils.log import get_logger
 from datetime import datetime
 
-from elar import db
-from elar.models import CeleryHistory
+from elar.dal.celery_history import insert_task_history
+from elar.utils.batch_buffer import BatchBuffer
+from elar.utils.task_metrics import OUTCOME_FAILURE, OUTCOME_RETRY, OUTCOME_SUCCESS
+from worker.app_context import run_in_app_context
+from worker.metrics import queue_wait, task_metrics
+from worker.queues import QUEUE_BULK
 
 logger = get_logger(__name__)
 
+# configured in make_celery(), which also makes it flush at exit
+task_history = BatchBuffer(insert_task_history)
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def flush_buffers(**kwargs):
+    task_history.flush()
+    task_metrics.flush()
+
 
 class BaseTask(Task):
     abstract = True
     acks_late = True
     reject_on_worker_lost = True
+    queue = QUEUE_BULK
     ignore_result = False
     max_retries = int(os.getenv('CELERY_MAX_RETRIES_TIME', 2))
     default_retry_delay = int(os.getenv('CELERY_TIME_COUNTDOWN_RETRY', 30))
     validation_class = ''
     description = ''
 
+    def __call__(self, *args, **kwargs):
+        started = time.time()
+        outcome = OUTCOME_FAILURE
+        try:
+            result = run_in_app_context(self.app.flask_app, super().__call__, *args, **kwargs)
+            outcome = OUTCOME_SUCCESS
+            return result
+        except Retry:
+            outcome = OUTCOME_RETRY
+            raise
+        finally:
+            task_metrics.add(self.name, queue_wait(self.request, started), time.time() - started, outcome)
+
     def log_task(self):
-        celery_log = CeleryHistory(task_name=self.name, task_timestamp=datetime.now())
-        db.session.add(celery_log)
-        db.session.commit()
+        task_history.add(self.name, datetime.now())
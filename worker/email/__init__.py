@@ -0,0 +1,3 @@
+from .task import EmailDispatchTask
+
+__all__ = ['EmailDispatchTask']
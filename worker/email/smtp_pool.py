@@ -0,0 +1,63 @@
+import smtplib
+import threading
+import time
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+class PooledMailConnection():
+    """
+    SMTP connection of the worker process kept open between tasks, so that
+    consecutive emails skip connect, TLS and login. Dropped after
+    `idle_timeout` seconds without use (servers close idle sessions anyway)
+    and reopened once when the server disconnects in the middle of a batch.
+    """
+
+    def __init__(self, mail, idle_timeout=60):
+        self.mail = mail
+        self.idle_timeout = idle_timeout
+        self._connection = None
+        self._used_at = 0
+        self._lock = threading.Lock()
+
+    def _open(self):
+        connection = self.mail.connect()
+        connection.__enter__()
+        return connection
+
+    def close(self):
+        if self._connection is not None:
+            try:
+                self._connection.__exit__(None, None, None)
+            except smtplib.SMTPException:
+                pass
+            self._connection = None
+
+    def send_all(self, messages):
+        """
+        Send messages over the pooled connection, returns the ones that failed.
+        """
+        failed = []
+        with self._lock:
+            if self._connection is not None and time.monotonic() - self._used_at > self.idle_timeout:
+                self.close()
+            for message in messages:
+                try:
+                    self._send(message)
+                except (smtplib.SMTPException, OSError) as e:
+                    logger.error(f'Email dispatch. Sending to {message.recipients} failed: {e}')
+                    failed.append(message)
+            self._used_at = time.monotonic()
+        return failed
+
+    def _send(self, message):
+        if self._connection is None:
+            self._connection = self._open()
+        try:
+            self._connection.send(message)
+        except smtplib.SMTPServerDisconnected:
+            self.close()
+            self._connection = self._open()
+            self._connection.send(message)
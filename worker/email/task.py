@@ -0,0 +1,27 @@
+from elar import mail
+from elar.notification.email_dispatch import EMAIL_DISPATCH_TASK, build_message, email_payload
+from worker.base_task import BaseTask
+from worker.email.smtp_pool import PooledMailConnection
+from worker.queues import QUEUE_MAIL
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+mail_connection = PooledMailConnection(mail)
+
+
+class EmailDispatchTask(BaseTask):
+    name = EMAIL_DISPATCH_TASK
+    queue = QUEUE_MAIL
+
+    def run(self, payloads):
+        messages = [build_message(payload) for payload in payloads]
+        failed = mail_connection.send_all(messages)
+        logger.info(f'Email dispatch. {len(messages) - len(failed)} of {len(messages)} emails sent')
+        if failed:
+            # only the failed ones are sent again
+            raise self.retry(args=[[
+                email_payload(m.subject, m.recipients, html=m.html, body=m.body, sender=m.sender)
+                for m in failed
+            ]])
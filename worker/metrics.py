@@ -0,0 +1,40 @@
+import time
+from datetime import datetime
+
+from celery.signals import before_task_publish
+from flask import current_app
+
+from elar.utils.batch_buffer import BatchBuffer
+from elar.utils.task_metrics import METRICS_KEY, metric_fields
+
+ENQUEUED_AT_HEADER = 'enqueued_at'
+
+
+@before_task_publish.connect
+def stamp_enqueued_at(headers=None, **kwargs):
+    # becomes an attribute of task.request on the worker side
+    if headers is not None:
+        headers[ENQUEUED_AT_HEADER] = time.time()
+
+
+def queue_wait(request, started):
+    """
+    Seconds the task waited in the queue, counted from its eta (countdown,
+    retry) when it had one. None for calls not coming from the broker.
+    """
+    enqueued_at = getattr(request, ENQUEUED_AT_HEADER, None)
+    if enqueued_at is None:
+        return None
+    if request.eta:
+        eta = datetime.fromisoformat(request.eta) if isinstance(request.eta, str) else request.eta
+        enqueued_at = max(enqueued_at, eta.timestamp())
+    return started - enqueued_at
+
+
+def push_metrics(observations):
+    current_app.redis.incr_hash(METRICS_KEY, metric_fields(observations))
+
+
+# observations are summed in process and pushed to Redis every few seconds,
+# tasks only pay an append (configured in make_celery())
+task_metrics = BatchBuffer(push_metrics)
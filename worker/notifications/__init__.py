@@ -0,0 +1,3 @@
+from .task import NotificationTask
+
+__all__ = ['NotificationTask']
@@ -0,0 +1,25 @@
+from elar.notification.email_dispatch import build_message, enqueue_emails, email_payload
+from elar.notification.engine import NOTIFICATION_TASK
+from worker.base_task import BaseTask
+from worker.email.task import mail_connection
+from worker.queues import QUEUE_MAIL
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationTask(BaseTask):
+    name = NOTIFICATION_TASK
+    queue = QUEUE_MAIL
+
+    def run(self, trigger_name, groups):
+        payloads = self.app.flask_app.notification_engine.build_payloads(trigger_name, groups)
+        failed = mail_connection.send_all([build_message(payload) for payload in payloads])
+        logger.info(f'Notification {trigger_name}. {len(payloads) - len(failed)} of {len(payloads)} emails sent')
+        if failed:
+            # handed over to the dispatch task, which retries them
+            enqueue_emails([
+                email_payload(m.subject, m.recipients, html=m.html, body=m.body, sender=m.sender)
+                for m in failed
+            ])
@@ -0,0 +1,8 @@
+# latency sensitive: password resets, invitations, notifications
+QUEUE_MAIL = 'mail'
+# ingestion and reconciliation, allowed to pile up
+QUEUE_BULK = 'bulk'
+# beat driven maintenance
+QUEUE_PERIODIC = 'periodic'
+
+QUEUES = (QUEUE_MAIL, QUEUE_BULK, QUEUE_PERIODIC)
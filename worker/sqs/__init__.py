@@ -0,0 +1,3 @@
+from .consumer import LocalQueue, SqsConsumer, SqsQueue, parse_s3_records
+
+__all__ = ['LocalQueue', 'SqsConsumer', 'SqsQueue', 'parse_s3_records']
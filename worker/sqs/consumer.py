@@ -0,0 +1,167 @@
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote_plus
+import itertools
+import json
+import logging
+import threading
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+from elar.utils.aws_clients import get_client
+
+
+logger = logging.getLogger(__name__)
+
+# SQS limits for one receive_message / delete_message_batch call
+MAX_BATCH_SIZE = 10
+MAX_WAIT_TIME_SECONDS = 20
+# longest pause after repeated receive / delete errors
+MAX_ERROR_DELAY_SECONDS = 60
+
+
+def parse_s3_records(body):
+    """
+    (bucket name, object key) of every record of S3 event notification.
+    S3 test events and other bodies without records give an empty list.
+    """
+    event = json.loads(body)
+    return [
+        (record['s3']['bucket']['name'], unquote_plus(record['s3']['object']['key']))
+        for record in event.get('Records', [])
+        if 's3' in record
+    ]
+
+
+class SqsQueue():
+    def __init__(self, client, queue_url, visibility_timeout=60):
+        self.client = client
+        self.queue_url = queue_url
+        self.visibility_timeout = visibility_timeout
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(get_client('sqs', **config['AWS_SQS']), config['AWS_SQS_QUEUE_URL'])
+
+    def receive(self, max_messages=MAX_BATCH_SIZE, wait_time=MAX_WAIT_TIME_SECONDS):
+        response = self.client.receive_message(
+            QueueUrl=self.queue_url,
+            MaxNumberOfMessages=max_messages,
+            VisibilityTimeout=self.visibility_timeout,
+            WaitTimeSeconds=wait_time,
+        )
+        return response.get('Messages', [])
+
+    def delete_batch(self, receipt_handles):
+        """
+        Returns receipt handles SQS failed to delete.
+        """
+        failed = []
+        for offset in range(0, len(receipt_handles), MAX_BATCH_SIZE):
+            chunk = receipt_handles[offset:offset + MAX_BATCH_SIZE]
+            response = self.client.delete_message_batch(
+                QueueUrl=self.queue_url,
+                Entries=[{'Id': str(i), 'ReceiptHandle': handle} for i, handle in enumerate(chunk)],
+            )
+            failed.extend(chunk[int(entry['Id'])] for entry in response.get('Failed', []))
+        return failed
+
+
+class LocalQueue():
+    """
+    In-memory stand-in for SqsQueue. Received messages stay invisible
+    until deleted or handed back with release().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._handles = itertools.count()
+        self.visible = []
+        self.in_flight = {}
+
+    def send(self, body):
+        with self._lock:
+            self.visible.append(body)
+
+    def receive(self, max_messages=MAX_BATCH_SIZE, wait_time=0):
+        with self._lock:
+            bodies, self.visible = self.visible[:max_messages], self.visible[max_messages:]
+            messages = [{'ReceiptHandle': f'handle-{next(self._handles)}', 'Body': body} for body in bodies]
+            self.in_flight.update((message['ReceiptHandle'], message['Body']) for message in messages)
+        return messages
+
+    def delete_batch(self, receipt_handles):
+        with self._lock:
+            for handle in receipt_handles:
+                self.in_flight.pop(handle, None)
+        return []
+
+    def release(self):
+        with self._lock:
+            self.visible.extend(self.in_flight.values())
+            self.in_flight.clear()
+
+
+class SqsConsumer():
+    """
+    Long polls the queue for up to 10 messages at a time and calls
+    handler(bucket_name, object_key) for every S3 record of them, in a
+    thread pool. A message is acknowledged, in one delete_message_batch per
+    poll, only when all of its records were handled; otherwise it shows up
+    again after the visibility timeout. SQS errors (throttling, network,
+    expired credentials) are logged and polling resumes after a growing
+    delay.
+    """
+
+    def __init__(self, queue, handler, max_workers=8, wait_time=MAX_WAIT_TIME_SECONDS, error_delay=1):
+        self.queue = queue
+        self.handler = handler
+        self.wait_time = wait_time
+        self.error_delay = error_delay
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def _submit(self, message):
+        try:
+            records = parse_s3_records(message['Body'])
+        except (ValueError, KeyError, TypeError):
+            logger.error(f'SQS consumer. Malformed message dropped: {message["Body"][:200]}')
+            return []
+        return [self.executor.submit(self.handler, bucket_name, object_key) for bucket_name, object_key in records]
+
+    @staticmethod
+    def _succeeded(futures):
+        succeeded = True
+        for future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f'SQS consumer. Record handling failed: {e}')
+                succeeded = False
+        return succeeded
+
+    def poll(self):
+        """
+        One receive, process, acknowledge round. Returns number of
+        acknowledged messages.
+        """
+        messages = self.queue.receive(MAX_BATCH_SIZE, self.wait_time)
+        # records of all received messages are submitted before waiting for any
+        pending = [(message, self._submit(message)) for message in messages]
+        done = [message['ReceiptHandle'] for message, futures in pending if self._succeeded(futures)]
+        if not done:
+            return 0
+        failed = self.queue.delete_batch(done)
+        if failed:
+            logger.error(f'SQS consumer. {len(failed)} messages were not deleted')
+        return len(done) - len(failed)
+
+    def run(self, stop_event):
+        delay = 0
+        while not stop_event.is_set():
+            try:
+                self.poll()
+                delay = 0
+            except (BotoCoreError, ClientError) as e:
+                delay = min(delay * 2 or self.error_delay, MAX_ERROR_DELAY_SECONDS)
+                logger.error(f'SQS consumer. Polling failed, retrying in {delay}s: {e}')
+                stop_event.wait(delay)
+        self.executor.shutdown()
@@ -0,0 +1,3 @@
+from .task import CeleryHistoryPartitionTask
+
+__all__ = ['CeleryHistoryPartitionTask']
@@ -0,0 +1,25 @@
+from elar.dal.celery_history import drop_history_partitions, ensure_history_partitions
+from worker.base_task import BaseTask
+from worker.queues import QUEUE_PERIODIC
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+class CeleryHistoryPartitionTask(BaseTask):
+    """
+    Keeps monthly partitions of sb_celery_history created ahead of time and,
+    with CELERY_HISTORY_RETENTION_MONTHS set, drops the expired ones.
+    """
+    name = 'CeleryHistoryPartitionTask'
+    queue = QUEUE_PERIODIC
+
+    def run(self):
+        config = self.app.flask_app.config
+        created = ensure_history_partitions(config.get('CELERY_HISTORY_PARTITIONS_AHEAD', 2))
+        dropped = []
+        if config.get('CELERY_HISTORY_RETENTION_MONTHS'):
+            dropped = drop_history_partitions(config['CELERY_HISTORY_RETENTION_MONTHS'])
+        logger.info(f'Celery history partitions. Created {created}, dropped {dropped}')
+        return created, dropped
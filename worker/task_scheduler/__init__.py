@@ -0,0 +1,3 @@
+from .task import TaskNotificationSchedulerTask
+
+__all__ = ['TaskNotificationSchedulerTask']
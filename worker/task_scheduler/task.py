@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from elar.dal.task_scheduler import schedule_task_notifications
+from worker.base_task import BaseTask
+from worker.queues import QUEUE_PERIODIC
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+class TaskNotificationSchedulerTask(BaseTask):
+    """
+    Periodic (celery beat) expansion of task definitions into notifications.
+    The horizon must exceed the longest lead time between a notification
+    and its due date, otherwise such notifications get scheduled late.
+    """
+    name = 'TaskNotificationSchedulerTask'
+    queue = QUEUE_PERIODIC
+
+    def run(self):
+        self.log_task()
+        horizon = timedelta(days=self.app.flask_app.config.get('TASK_SCHEDULER_HORIZON_DAYS', 45))
+        scheduled = schedule_task_notifications(horizon)
+        logger.info(f'Task scheduler. {scheduled} notifications scheduled')
+        return scheduled
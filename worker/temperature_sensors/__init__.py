@@ -1,3 +1,3 @@
-from .task import TemperatureSensorTask
+from .task import TemperatureSensorTask, TemperatureSensorBatchTask
 
-__all__ = ['TemperatureSensorTask']
+__all__ = ['TemperatureSensorTask', 'TemperatureSensorBatchTask']
@@ -1,5 +1,7 @@
 from elar import db
 # from elar.models import TemperatureSensorMeasurement
+from elar.dal.sensor_measurements import insert_measurements
+from elar.sensors import MEASUREMENT_BATCH_TASK, validate_measurements
 from worker.base_task import BaseTask
 import random
 import logging
@@ -16,9 +18,26 @@ class TemperatureSensorTask(BaseTask):
 
     def run(self, sensor_id):
         logger.info('Celery. Email task started. Handling incoming emails.')
-        with self.app.flask_app.app_context():
-            self.log_task()
-            logger.error(f'___ TemperatureSensorTask {sensor_id}')
-            # new_random_measurement = TemperatureSensorMeasurement(sensor_id=sensor_id, value=random.randint(20, 28), created_by_id=1)
-            # db.session.add(new_random_measurement)
-            # db.session.commit()
+        self.log_task()
+        logger.error(f'___ TemperatureSensorTask {sensor_id}')
+        # new_random_measurement = TemperatureSensorMeasurement(sensor_id=sensor_id, value=random.randint(20, 28), created_by_id=1)
+        # db.session.add(new_random_measurement)
+        # db.session.commit()
+
+
+class TemperatureSensorBatchTask(BaseTask):
+    """
+    Many [sensor_id, value, timestamp] readings per message, validated
+    together and written with one INSERT (see elar.sensors.record_measurement).
+    """
+    name = MEASUREMENT_BATCH_TASK
+
+    def run(self, readings):
+        self.log_task()
+        config = self.app.flask_app.config
+        rows, dropped = validate_measurements(
+            readings, config.get('SENSOR_VALUE_MIN', -60), config.get('SENSOR_VALUE_MAX', 150)
+        )
+        inserted = insert_measurements(rows)
+        logger.info(f'Sensor measurements. {inserted} of {len(readings)} stored, {dropped} invalid')
+        return inserted
@@ -0,0 +1,3 @@
+from .task import UploadIndexReconcileTask
+
+__all__ = ['UploadIndexReconcileTask']
@@ -0,0 +1,19 @@
+from elar.utils.aws_clients import get_client
+from elar.utils.upload_index import rebuild_upload_index
+from worker.base_task import BaseTask
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+class UploadIndexReconcileTask(BaseTask):
+    name = 'UploadIndexReconcileTask'
+
+    def run(self, sub_folder=None):
+        self.log_task()
+        app = self.app.flask_app
+        s3 = get_client('s3', **app.config['AWS'])
+        indexed = rebuild_upload_index(s3, app.config['UPLOAD_DOC_S3_BUCKET'], sub_folder)
+        logger.info(f'Upload index of {sub_folder or "bucket root"} rebuilt, {indexed} objects')
+        return indexed